@@ -7,21 +7,16 @@
                     Kareem Salah Noureddine
 ****************************************************************************************************
 """
+# Imported first so the startup report can time every import below
+import startup_timing  # isort: skip
+
 import os
 import random
 import sys
 import webbrowser
-from io import BytesIO
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import pyqtgraph as pg
-import wfdb
-from docx import Document
-from docx2pdf import convert
-from docx.shared import Inches
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 from PyQt5 import QtGui
 from PyQt5.QtCore import QPoint, Qt, QTimer
 from PyQt5.QtGui import QBrush, QColor, QCursor, QIcon
@@ -32,25 +27,41 @@ from PyQt5.QtWidgets import (
     QCheckBox,
     QColorDialog,
     QComboBox,
+    QDialog,
+    QDoubleSpinBox,
+    QDialogButtonBox,
     QFileDialog,
+    QFormLayout,
     QHBoxLayout,
     QHeaderView,
     QLabel,
+    QListWidget,
+    QListWidgetItem,
     QMainWindow,
     QMenu,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QSlider,
+    QSpinBox,
     QTableWidget,
     QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
-from pyqtgraph.exporters import ImageExporter
+
+from cine_export import CineExporter, find_video_encoder
+from frame_preparation import FramePreparer
+from overview import SignalOverview
+from pattern_search import PatternSearch
+from pdf_report import PdfReportWriter, Snapshot
+from range_export import EXPORT_FORMATS, RangeExporter
+from signal_storage import compress_signal, read_signal_file
+from tile_cache import TileCache
 
 
 class SignalViewer(QMainWindow):
-    def __init__(self):
+    def __init__(self, tile_cache_mb=64):
         super().__init__()
 
         # --- Main Window Initialization --- #
@@ -72,15 +83,40 @@ class SignalViewer(QMainWindow):
         import_action.triggered.connect(self.import_signal)
         import_action.setShortcut("Ctrl+I")
 
+        export_cine_action = QAction("Export Cine...", self)
+        export_cine_action.triggered.connect(self.export_cine_event)
+        export_cine_action.setShortcut("Ctrl+E")
+
+        export_range_action = QAction("Export Range...", self)
+        export_range_action.triggered.connect(self.export_range_event)
+
         exit_action = QAction("Exit App", self)
         exit_action.setShortcut("Ctrl+Q")
         exit_action.triggered.connect(lambda: QApplication.quit())
 
+        # Decode each imported source in its own process, feeding shared-memory rings
+        self.acquisition_workers_action = QAction("Acquire in Worker Processes", self)
+        self.acquisition_workers_action.setCheckable(True)
+
+        # Keep imported signals in compressed blocks, for long monitoring sessions
+        self.compress_storage_action = QAction("Compress Signal Storage", self)
+        self.compress_storage_action.setCheckable(True)
+
+        # Stream the graphs to other viewers on this machine (see signal_client.py)
+        self.serve_signals_action = QAction("Serve Signals on Localhost", self)
+        self.serve_signals_action.setCheckable(True)
+        self.serve_signals_action.toggled.connect(self.serve_signals_toggled)
+
         file_menu.addAction(import_action)
+        file_menu.addAction(self.acquisition_workers_action)
+        file_menu.addAction(self.compress_storage_action)
+        file_menu.addAction(self.serve_signals_action)
+        file_menu.addAction(export_cine_action)
+        file_menu.addAction(export_range_action)
         file_menu.addAction(exit_action)
 
         pdf_report = QAction("Generate PDF Report", self)
-        pdf_report.triggered.connect(self.convert_to_pdf)
+        pdf_report.triggered.connect(self.generate_pdf_report)
         pdf_report.setShortcut("Ctrl+R")
 
         view_menu.addAction(pdf_report)
@@ -163,12 +199,14 @@ class SignalViewer(QMainWindow):
         self.plot_1 = self.plot_widget_1.plot()
         self.plot_widget_1.setYRange(-1, 1)
         self.plot_widget_1.setXRange(0, 1, padding=0)
+        self.plot_widget_1.setLabel("bottom", "Time", units="s")
 
         # Additional graph setup for plot_widget_2
         self.plot_widget_2.setBackground("black")
         self.plot_2 = self.plot_widget_2.plot()
         self.plot_widget_2.setYRange(-1, 1)
         self.plot_widget_2.setXRange(0, 1, padding=0)
+        self.plot_widget_2.setLabel("bottom", "Time", units="s")
 
         # Create a QTimer for each graph to update the plots
         self.timer_1 = QTimer(self)
@@ -177,10 +215,36 @@ class SignalViewer(QMainWindow):
         self.timer_2 = QTimer(self)
         self.timer_2.timeout.connect(self.update_plot_2)
 
+        # Redraw paused graphs from the tile cache when they are panned or zoomed
+        self.redrawing_graph = False
+        self.plot_widget_1.sigXRangeChanged.connect(lambda: self.view_range_changed(0))
+        self.plot_widget_2.sigXRangeChanged.connect(lambda: self.view_range_changed(1))
+
+        # Overview strips under each graph: the whole recording's envelope, with a
+        # draggable region bound to the graph's viewport
+        self.overview_widget_1 = self.create_overview_widget()
+        self.overview_widget_2 = self.create_overview_widget()
+        self.overview_region_1 = pg.LinearRegionItem(values=(0, 1))
+        self.overview_region_2 = pg.LinearRegionItem(values=(0, 1))
+        self.overview_region_1.sigRegionChanged.connect(
+            lambda: self.overview_region_changed(0)
+        )
+        self.overview_region_2.sigRegionChanged.connect(
+            lambda: self.overview_region_changed(1)
+        )
+        self.plot_widget_1.sigXRangeChanged.connect(
+            lambda: self.sync_overview_region(0)
+        )
+        self.plot_widget_2.sigXRangeChanged.connect(
+            lambda: self.sync_overview_region(1)
+        )
+
         # Create a layout to hold the two graph widgets
         middle_layout = QVBoxLayout()
         middle_layout.addWidget(self.plot_widget_1)
+        middle_layout.addWidget(self.overview_widget_1)
         middle_layout.addWidget(self.plot_widget_2)
+        middle_layout.addWidget(self.overview_widget_2)
 
         # Add the layout to the middle section
         middle_widget_layout.addLayout(middle_layout)
@@ -206,6 +270,19 @@ class SignalViewer(QMainWindow):
         self.reset_button.setIcon(QIcon("Resources/Icons/reset_button.png"))
         self.reset_button.clicked.connect(self.reset_signal)
 
+        # Sweep (erase-bar) display mode, as on bedside monitors
+        self.sweep_mode = False
+        self.sweep_mode_checkbox = QCheckBox("Sweep Mode")
+        self.sweep_mode_checkbox.stateChanged.connect(self.sweep_mode_changed)
+
+        # Seconds shown by the cine and sweep windows, the same for every signal
+        self.window_label = QLabel("Window:")
+        self.window_spinbox = QDoubleSpinBox()
+        self.window_spinbox.setDecimals(4)
+        self.window_spinbox.setRange(0.001, 3600)
+        self.window_spinbox.setSuffix(" s")
+        self.window_spinbox.valueChanged.connect(self.window_changed)
+
         self.linked_graphs = False
         self.link_graphs_checkbox = QCheckBox("Link Graphs")
         self.link_graphs_checkbox.setShortcut("Ctrl+L")
@@ -239,6 +316,14 @@ class SignalViewer(QMainWindow):
         take_snapshot_button = QPushButton("Take Snapshot", self)
         take_snapshot_button.clicked.connect(self.take_snapshot_event)
 
+        # Select a waveform on the selected graph and search every signal for it
+        self.select_pattern_button = QPushButton("Select Pattern", self)
+        self.select_pattern_button.setCheckable(True)
+        self.select_pattern_button.toggled.connect(self.select_pattern_toggled)
+
+        find_similar_button = QPushButton("Find Similar", self)
+        find_similar_button.clicked.connect(self.find_similar_event)
+
         # Create a layout for the controls with vertical alignment
         buttons_layout = QVBoxLayout()
         buttons_layout.addWidget(self.guidance_label)
@@ -255,16 +340,32 @@ class SignalViewer(QMainWindow):
         buttons_layout.addWidget(self.zoom_out_button)
         buttons_layout.addWidget(self.speed_label)
         buttons_layout.addWidget(self.speed_slider)
+        buttons_layout.addWidget(self.sweep_mode_checkbox)
+        buttons_layout.addWidget(self.window_label)
+        buttons_layout.addWidget(self.window_spinbox)
         buttons_layout.addSpacing(50)
         buttons_layout.addWidget(take_snapshot_button)
+        buttons_layout.addSpacing(50)
+        buttons_layout.addWidget(self.select_pattern_button)
+        buttons_layout.addWidget(find_similar_button)
 
         # Add the buttons layout to the right section
         right_layout.addLayout(buttons_layout)
 
         # Create a dictionary to map graph selector indices to corresponding timers and plots
         self.graph_map = {
-            0: {"timer": self.timer_1, "plot": self.plot_1},
-            1: {"timer": self.timer_2, "plot": self.plot_2},
+            0: {
+                "timer": self.timer_1,
+                "plot": self.plot_1,
+                "overview": self.overview_widget_1,
+                "overview_region": self.overview_region_1,
+            },
+            1: {
+                "timer": self.timer_2,
+                "plot": self.plot_2,
+                "overview": self.overview_widget_2,
+                "overview_region": self.overview_region_2,
+            },
         }
 
         # Initial playing state for both graphs
@@ -291,9 +392,46 @@ class SignalViewer(QMainWindow):
         self.table_1 = []
         self.table_2 = []
 
+        # Region selected for "Find Similar" and the graph it was drawn on
+        self.pattern_region = None
+        self.pattern_graph = 0
+        self.search_results_dialog = None
+
+        # Preallocated screen-width buffers, curve segments and erase bar of each graph
+        # while in sweep mode
+        self.sweep_state = {0: None, 1: None}
+        self.sweep_segments = 10  # Curve pieces, so only the ones being written repaint
+
+        # Set from the first imported signal to 150 of its samples, then by the user
+        self.window_seconds = None
+
         # Add a list to store the colors associated with each signal
         self.signal_colors = []
 
+        # Tiles of decoded, scaled and decimated data ready for display, shared by all
+        # signals and evicted LRU once they exceed the memory budget
+        self.tile_cache = TileCache(memory_budget=tile_cache_mb * 1024 * 1024)
+        self.signal_cache_ids = []  # Tile cache id of each imported signal
+
+        # Cine frames are prepared one ahead on a worker thread and drawn into
+        # persistent curves, one per signal
+        self.frame_preparer = FramePreparer(self.tile_cache)
+        self.graph_curves = {0: {}, 1: {}}  # row -> PlotDataItem
+        self.signal_overviews = []  # Precomputed envelope of each imported signal
+        self.syncing_overview = False
+
+        # Worker processes, their queue and event are only created once the first source
+        # is imported with them
+        self.acquisition = None
+        self.acquisition_timer = QTimer(self)
+        self.acquisition_timer.timeout.connect(self.poll_acquisition_workers)
+
+        # Only started from the File menu
+        self.signal_server = None
+
+        # Snapshots taken since the start, written out by Generate PDF Report
+        self.report_snapshots = []
+
     # --- Import and Plotting Methods --- #
     # ----------------------------------- #
     def import_signal(self):
@@ -302,64 +440,91 @@ class SignalViewer(QMainWindow):
             self,
             "Open Signal Files",
             "",
-            "Signal Files (*.csv *.hea *.dat);;All Files (*)",
+            "Signal Files (*.csv *.txt *.hea *.dat);;All Files (*)",
             options=options,
         )
 
         if file_paths:
             for file_path in file_paths:
+                if self.acquisition_workers_action.isChecked():
+                    # Decode in a worker process, the signal is added once it publishes
+                    if self.acquisition is None:
+                        acquisition = startup_timing.lazy_import("acquisition")
+                        self.acquisition = acquisition.AcquisitionManager()
+                    self.acquisition.start(file_path)
+                    self.acquisition_timer.start(100)
+                    continue
                 try:
-                    selected_graph = 0
+                    # Keep the samples compact (int16 ADC counts or float32), they
+                    # are converted to physical units only when sliced
+                    signal_data = read_signal_file(file_path)
+                    if self.compress_storage_action.isChecked():
+                        signal_data = compress_signal(signal_data)
+                    self.add_imported_signal(file_path, signal_data)
+                except Exception as e:
+                    print(f"Error loading the file: {e}")
 
-                    if file_path.endswith(".hea") or file_path.endswith(".dat"):
-                        # Read signal data from .hea and .dat files using wfdb library
-                        record = wfdb.rdrecord(
-                            file_path[:-4]
-                        )  # Remove ".hea" extension
-                        signal_data = record.p_signal[:, 0]  # Use the first channel
+            self.update_signal_list()
 
-                    elif file_path.endswith(".csv"):
-                        # Use pandas to read the CSV file
-                        data_frame = pd.read_csv(file_path)
-                        # Assuming the signal data is in a column named "Signal" in the CSV file
-                        signal_data = data_frame["values"].to_numpy()
+    def add_imported_signal(self, file_path, signal_data):
+        selected_graph = 0
 
-                    # Store the imported signal data and its associated graph number
-                    self.imported_signals.append((signal_data, selected_graph))
+        # Store the imported signal data and its associated graph number
+        self.imported_signals.append((signal_data, selected_graph))
+        # One chunked pass builds the overview envelope and the per-tile summaries the
+        # tile cache reads running extrema from
+        overview = SignalOverview(signal_data, tile_size=self.tile_cache.tile_size)
+        self.signal_overviews.append(overview)
+        self.signal_cache_ids.append(self.tile_cache.add_signal(signal_data, overview))
 
-                    # Ensure the self.signal_colors list has enough elements
-                    self.ensure_signal_colors_length(len(self.imported_files))
+        # Ensure the self.signal_colors list has enough elements
+        self.ensure_signal_colors_length(len(self.imported_files))
 
-                    # Choose a color for this imported signal (e.g., based on the index)
-                    color = self.get_random_signal_color(len(self.imported_files))
-                    self.signal_colors.append(color)
+        # Choose a color for this imported signal (e.g., based on the index)
+        color = self.get_random_signal_color(len(self.imported_files))
+        self.signal_colors.append(color)
 
-                    # Reset the selected graph's data and X-axis range
-                    selected_timer = self.graph_map[selected_graph]["timer"]
-                    selected_timer.stop()
+        if self.window_seconds is None:
+            self.window_seconds = 150 * signal_data.time_index.period
+            self.window_spinbox.setValue(self.window_seconds)
 
-                    if selected_graph == 0:
-                        self.signal_data_1 = signal_data
-                        self.signal_index_1 = 0  # Set the index to 0
-                        self.table_1.append((file_path, selected_graph))
+        # Reset the selected graph's data and X-axis range
+        selected_timer = self.graph_map[selected_graph]["timer"]
+        selected_timer.stop()
 
-                    elif selected_graph == 1:
-                        self.signal_data_2 = signal_data
-                        self.signal_index_2 = 0  # Set the index to 0
-                        self.table_2.append((file_path, selected_graph))
+        if selected_graph == 0:
+            self.signal_data_1 = signal_data
+            self.signal_index_1 = 0  # Set the index to 0
+            self.table_1.append((file_path, selected_graph))
 
-                    selected_timer.start(60)  # Start the timer for the selected graph
+        elif selected_graph == 1:
+            self.signal_data_2 = signal_data
+            self.signal_index_2 = 0  # Set the index to 0
+            self.table_2.append((file_path, selected_graph))
 
-                    # Add the imported file name and associated graph number to the list
-                    self.imported_files.append((file_path, selected_graph))
+        selected_timer.start(60)  # Start the timer for the selected graph
 
-                except Exception as e:
-                    print(f"Error loading the file: {e}")
+        # Add the imported file name and associated graph number to the list
+        self.imported_files.append((file_path, selected_graph))
 
+    def poll_acquisition_workers(self):
+        # Pick up sources whose worker has started publishing into its ring buffer
+        added = False
+        for file_path, signal_data, error in self.acquisition.poll():
+            if error is not None:
+                print(f"Error loading the file: {error}")
+                continue
+            try:
+                self.add_imported_signal(file_path, signal_data)
+                added = True
+            except Exception as e:
+                print(f"Error loading the file: {e}")
+        if added:
             self.update_signal_list()
+        if self.acquisition.pending == 0:
+            self.acquisition_timer.stop()
 
     def update_plot_1(self):
-        self.plot_widget_1.clear()
         if (
             self.playing_state[0]
             and self.signal_data_1 is not None
@@ -367,44 +532,17 @@ class SignalViewer(QMainWindow):
         ):
             try:
                 self.signal_index_1 += 1
-
-                # Iterate through imported signals and plot them with different colors
-                for i, (signal_data, graph_number) in enumerate(self.imported_signals):
-                    if graph_number == 0:
-                        x_data = np.arange(self.signal_index_1)
-                        y_data = signal_data[: self.signal_index_1]
-
-                        # Get the color for this signal from the self.signal_colors list
-                        color = pg.mkColor(self.signal_colors[i])
-
-                        # Calculate the Y-axis range based on the current data
-                        y_max = max(y_data)
-                        y_min = min(y_data)
-                        # Check the visibility status for this signal
-                        visibility_checkbox = self.signals_info_table_1.cellWidget(i, 3)
-                        if visibility_checkbox.isChecked():
-                            self.plot_widget_1.plot(x=x_data, y=y_data, pen=color)
-
-                        # Set the Y-axis range for the plot
-                        self.plot_widget_1.setYRange(y_min, y_max, padding=0.1)
-
-                        # Calculate the visible range for the X-axis based on the current signal_index_1
-                        visible_range = (self.signal_index_1 - 150, self.signal_index_1)
-                        # Set the X-axis limits to control the visible range
-                        x_min_limit = 0  # Set the minimum X-axis limit
-                        x_max_limit = (
-                            self.signal_index_1 + 0.1
-                        )  # Set the maximum X-axis limit
-                        self.plot_widget_1.setLimits(
-                            xMin=x_min_limit, xMax=x_max_limit, yMin=y_min, yMax=y_max
-                        )
-                        self.plot_widget_1.setXRange(*visible_range, padding=0)
+                self.extend_overview(0)
+                if self.sweep_mode:
+                    self.sweep_graph(0, self.signal_index_1)
+                else:
+                    self.draw_graph(0, self.signal_index_1)
+                self.publish_playhead(0)
             except Exception as e:
                 print(f"Error updating the plot for graph 1: {e}")
         pass
 
     def update_plot_2(self):
-        self.plot_widget_2.clear()
         if (
             self.playing_state[1]
             and self.signal_data_2 is not None
@@ -412,47 +550,651 @@ class SignalViewer(QMainWindow):
         ):
             try:
                 self.signal_index_2 += 1
-
-                # Iterate through imported signals and plot them with different colors
-                for i, (signal_data, graph_number) in enumerate(self.imported_signals):
-                    if graph_number == 1:
-                        x_data = np.arange(self.signal_index_2)
-                        y_data = signal_data[: self.signal_index_2]
-
-                        # Get the color for this signal from the self.signal_colors list
-                        color = pg.mkColor(self.signal_colors[i])
-                        # Calculate the Y-axis range based on the current data
-                        y_max = max(y_data)
-                        y_min = min(y_data)
-
-                        # Check the visibility status for this signal
-                        visibility_checkbox = self.signals_info_table_2.cellWidget(i, 3)
-                        if visibility_checkbox.isChecked():
-                            self.plot_widget_2.plot(x=x_data, y=y_data, pen=color)
-
-                        # Scroll the plot to keep the most recent data in view
-                        # Set the Y-axis range for the plot
-                        self.plot_widget_2.setYRange(y_min, y_max, padding=0.1)
-
-                        # Calculate the visible range for the X-axis based on the current signal_index_1
-                        visible_range = (self.signal_index_2 - 150, self.signal_index_2)
-                        # Set the X-axis limits to control the visible range
-                        x_min_limit = 0  # Set the minimum X-axis limit
-                        x_max_limit = (
-                            self.signal_index_2 + 0.1
-                        )  # Set the maximum X-axis limit
-                        self.plot_widget_2.setLimits(
-                            xMin=x_min_limit, xMax=x_max_limit, yMin=y_min, yMax=y_max
-                        )
-                        self.plot_widget_2.setXRange(*visible_range, padding=0)
-
+                self.extend_overview(1)
+                if self.sweep_mode:
+                    self.sweep_graph(1, self.signal_index_2)
+                else:
+                    self.draw_graph(1, self.signal_index_2)
+                self.publish_playhead(1)
             except Exception as e:
                 print(f"Error updating the plot for graph 2: {e}")
         pass
 
+    def draw_graph(self, graph_index, signal_index, view_range=None):
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+        info_table = (
+            self.signals_info_table_1 if graph_index == 0 else self.signals_info_table_2
+        )
+
+        # Follow the cine index unless we are redrawing a panned/zoomed viewport
+        following = view_range is None
+        if following:
+            view_range = self.following_range(graph_index, signal_index)
+
+        # Swap in the frame prepared on the worker thread, or prepare it here if it isn't
+        frame_args = self.frame_request(graph_index, signal_index, view_range)
+        frame = self.frame_preparer.take(graph_index, frame_args)
+        if frame is None:
+            frame = self.frame_preparer.prepare(*frame_args)
+
+        self.redrawing_graph = True
+        try:
+            curves = self.graph_curves[graph_index]
+            rows = [row for row, *_ in frame]
+            # Recreate the curves when the graph's signals changed or it was cleared
+            if list(curves) != rows or any(
+                curve.getViewBox() is None for curve in curves.values()
+            ):
+                plot_widget.clear()
+                if (
+                    self.pattern_region is not None
+                    and self.pattern_graph == graph_index
+                ):
+                    plot_widget.addItem(self.pattern_region)
+                curves.clear()
+                for row in rows:
+                    # Get the color for this signal from the self.signal_colors list
+                    color = pg.mkColor(self.signal_colors[row])
+                    # Gaps in the timestamps arrive as NaN and are left undrawn
+                    curves[row] = plot_widget.plot(pen=color, connect="finite")
+
+            y_min, y_max = np.inf, -np.inf
+            for row, x_data, y_data, signal_min, signal_max in frame:
+                # Check the visibility status for this signal
+                visibility_checkbox = info_table.cellWidget(row, 3)
+                curves[row].setVisible(
+                    visibility_checkbox is None or visibility_checkbox.isChecked()
+                )
+                curves[row].setData(x=x_data, y=y_data)
+                y_min, y_max = min(y_min, signal_min), max(y_max, signal_max)
+
+            if frame:
+                # Set the X-axis limits so the signal can't be panned past its ends
+                first_time = min(
+                    float(self.imported_signals[row][0].time_index.time_at(0))
+                    for row in rows
+                )
+                last_time = self.playhead_time(graph_index, signal_index)
+                plot_widget.setLimits(
+                    xMin=first_time,
+                    xMax=last_time + 1e-3 * self.window_seconds,
+                    yMin=y_min,
+                    yMax=y_max,
+                )
+
+                if following:
+                    # Scroll the plot to keep the most recent data in view
+                    plot_widget.setYRange(y_min, y_max, padding=0.1)
+                    plot_widget.setXRange(*view_range, padding=0)
+        finally:
+            self.redrawing_graph = False
+
+        # Prepare the next cine frame while the GUI thread is idle
+        if following:
+            next_frame_args = self.frame_request(
+                graph_index,
+                signal_index + 1,
+                self.following_range(graph_index, signal_index + 1),
+            )
+            self.frame_preparer.request(graph_index, next_frame_args)
+
+    def playhead_time(self, graph_index, signal_index):
+        # Time of the last played sample of the graph's signal, which every other
+        # signal on the graph is played up to
+        signal_data = self.signal_data_1 if graph_index == 0 else self.signal_data_2
+        return float(signal_data.time_index.time_at(max(1, signal_index) - 1))
+
+    def following_range(self, graph_index, signal_index):
+        # The cine window, in seconds, ending at the playhead
+        playhead = self.playhead_time(graph_index, signal_index)
+        return (playhead - self.window_seconds, playhead)
+
+    def frame_request(self, graph_index, signal_index, view_range):
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+        playhead = self.playhead_time(graph_index, signal_index)
+
+        # Binary search each signal's timestamps for the visible samples (plus one on
+        # each side), only those are fetched from the tile cache
+        sources = []
+        for i, (signal_data, graph_number) in enumerate(self.imported_signals):
+            if graph_number != graph_index:
+                continue
+            time_index = signal_data.time_index
+            played = min(len(signal_data), time_index.index_at(playhead, side="right"))
+            start = max(0, time_index.index_at(view_range[0]) - 1)
+            stop = min(played, time_index.index_at(view_range[1], side="right") + 1)
+            sources.append(
+                (i, self.signal_cache_ids[i], time_index, start, stop, played)
+            )
+        max_points = 2 * max(1, plot_widget.width())
+
+        return (tuple(sources), max_points)
+
+    def view_range_changed(self, graph_index):
+        # Redraw a paused graph from the tile cache when it is panned or zoomed
+        if (
+            self.redrawing_graph
+            or self.sweep_mode
+            or self.graph_map[graph_index]["timer"].isActive()
+        ):
+            return
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+        signal_index = self.signal_index_1 if graph_index == 0 else self.signal_index_2
+        if signal_index == 0:
+            return
+        try:
+            x_range, _ = plot_widget.plotItem.getViewBox().viewRange()
+            self.draw_graph(graph_index, signal_index, view_range=x_range)
+        except Exception as e:
+            print(f"Error redrawing graph {graph_index + 1}: {e}")
+
+    # --- Pattern Search --- #
+    # ---------------------- #
+    def select_pattern_toggled(self, checked):
+        if self.pattern_region is not None:
+            plot_widget = (
+                self.plot_widget_1 if self.pattern_graph == 0 else self.plot_widget_2
+            )
+            plot_widget.removeItem(self.pattern_region)
+            self.pattern_region = None
+        if not checked:
+            return
+        if self.sweep_mode:
+            print("Patterns can't be selected in sweep mode.")
+            self.select_pattern_button.setChecked(False)
+            return
+
+        # Start with the middle third of the selected graph's view
+        self.pattern_graph = self.graph_selector.currentIndex()
+        plot_widget = (
+            self.plot_widget_1 if self.pattern_graph == 0 else self.plot_widget_2
+        )
+        x_range, _ = plot_widget.plotItem.getViewBox().viewRange()
+        third = (x_range[1] - x_range[0]) / 3
+        self.pattern_region = pg.LinearRegionItem(
+            values=(x_range[0] + third, x_range[1] - third)
+        )
+        plot_widget.addItem(self.pattern_region)
+
+    def find_similar_event(self):
+        if self.pattern_region is None:
+            print("Select a pattern on a graph first.")
+            return
+
+        graph_index = self.pattern_graph
+        rows = [
+            i
+            for i, (_, graph_number) in enumerate(self.imported_signals)
+            if graph_number == graph_index
+        ]
+        if not rows:
+            print(f"No signals found for graph {graph_index}.")
+            return
+
+        # The pattern is cut from the signal selected in the table, or the graph's first
+        info_table = (
+            self.signals_info_table_1 if graph_index == 0 else self.signals_info_table_2
+        )
+        source_row = info_table.currentRow()
+        if source_row not in rows:
+            source_row = rows[0]
+        signal_data = self.imported_signals[source_row][0]
+        lo, hi = self.pattern_region.getRegion()
+        lo = signal_data.time_index.index_at(lo)
+        hi = min(len(signal_data), signal_data.time_index.index_at(hi, side="right"))
+        template = signal_data[lo:hi]
+
+        search = PatternSearch(
+            template,
+            [
+                (row, signal_data)
+                for row, (signal_data, _) in enumerate(self.imported_signals)
+            ],
+        )
+        search.start_search()
+        self.show_task_progress(
+            search,
+            "Searching for similar waveforms...",
+            lambda: self.show_search_results(search),
+        )
+
+    def show_search_results(self, search):
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Similar Waveforms ({len(search.hits)} found)")
+        layout = QVBoxLayout(dialog)
+        results_list = QListWidget()
+        for score, row, position in search.hits:
+            file_name = self.imported_files[row][0].split("/")[-1]
+            match_time = float(
+                self.imported_signals[row][0].time_index.time_at(position)
+            )
+            item = QListWidgetItem(f"{score:.3f}    {file_name}    {match_time:.4f} s")
+            item.setData(Qt.UserRole, (row, position, search.template_length))
+            results_list.addItem(item)
+        results_list.itemDoubleClicked.connect(
+            lambda item: self.jump_to_match(*item.data(Qt.UserRole))
+        )
+        layout.addWidget(QLabel("Double-click a match to jump to it:"))
+        layout.addWidget(results_list)
+
+        # Keep a reference so the non-modal dialog isn't garbage collected
+        self.search_results_dialog = dialog
+        dialog.show()
+
+    def jump_to_match(self, row, position, length):
+        signal_data, graph_index = self.imported_signals[row]
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+
+        # Pause the graph holding the match and bring the match into view
+        self.playing_state[graph_index] = False
+        self.graph_map[graph_index]["timer"].stop()
+        if graph_index == self.graph_selector.currentIndex():
+            self.pause_play_button.blockSignals(True)
+            self.pause_play_button.setChecked(True)
+            self.pause_play_button.blockSignals(False)
+            self.update_play_pause_button_icon(False)
+
+        # The match and a margin around it, in seconds
+        time_index = signal_data.time_index
+        match_start = float(time_index.time_at(position))
+        match_end = float(time_index.time_at(position + length - 1))
+        margin = max(match_end - match_start, 50 * time_index.period)
+        view_range = (match_start - margin, match_end + margin)
+
+        # Play the graph up to the end of that view
+        graph_signal = self.signal_data_1 if graph_index == 0 else self.signal_data_2
+        signal_index = min(
+            len(graph_signal),
+            max(1, graph_signal.time_index.index_at(view_range[1], side="right")),
+        )
+        if graph_index == 0:
+            self.signal_index_1 = signal_index
+        else:
+            self.signal_index_2 = signal_index
+        if self.sweep_mode:
+            self.sweep_graph(graph_index, signal_index)
+        else:
+            self.draw_graph(graph_index, signal_index, view_range=view_range)
+            plot_widget.setXRange(*view_range, padding=0)
+
+    # --- Sweep Mode --- #
+    # ------------------ #
+    def sweep_mode_changed(self, state):
+        self.sweep_mode = state == Qt.Checked
+        self.sweep_state = {0: None, 1: None}
+        for graph_index, plot_widget in enumerate(
+            [self.plot_widget_1, self.plot_widget_2]
+        ):
+            plot_widget.clear()
+            signal_index = (
+                self.signal_index_1 if graph_index == 0 else self.signal_index_2
+            )
+            if signal_index == 0:
+                continue
+            try:
+                if self.sweep_mode:
+                    self.sweep_graph(graph_index, signal_index)
+                else:
+                    self.draw_graph(graph_index, signal_index)
+            except Exception as e:
+                print(
+                    f"Error switching the display mode of graph {graph_index + 1}: {e}"
+                )
+
+    def sweep_graph(self, graph_index, signal_index):
+        rows = [
+            i
+            for i, (_, graph_number) in enumerate(self.imported_signals)
+            if graph_number == graph_index
+        ]
+        state = self.sweep_state[graph_index]
+
+        # Rebuild after a reset, a seek backwards, a signal moving between graphs or a
+        # new window length
+        if (
+            state is None
+            or state["rows"] != rows
+            or signal_index < state["index"]
+            or state["window"] != self.window_seconds
+        ):
+            self.setup_sweep(graph_index, rows, signal_index)
+            self.sync_overview_region(graph_index)
+            return
+
+        playhead = self.playhead_time(graph_index, signal_index)
+        dirty_segments = self.write_sweep(state, state["time"], playhead)
+        state["index"], state["time"] = signal_index, playhead
+        self.redraw_sweep_segments(graph_index, state, dirty_segments)
+
+        # Widen the Y range when the new samples go past the played extrema
+        extrema = self.sweep_extrema(rows, playhead)
+        if extrema != state["extrema"]:
+            self.set_sweep_y_range(graph_index, state, *extrema)
+        self.sync_overview_region(graph_index)
+
+    def sweep_extrema(self, rows, playhead):
+        # Y range of what is played so far, from the tile cache's per-tile summaries
+        y_min, y_max = np.inf, -np.inf
+        for i in rows:
+            signal_data = self.imported_signals[i][0]
+            played = min(
+                len(signal_data),
+                signal_data.time_index.index_at(playhead, side="right"),
+            )
+            signal_min, signal_max = self.tile_cache.extrema(
+                self.signal_cache_ids[i], played
+            )
+            y_min, y_max = min(y_min, signal_min), max(y_max, signal_max)
+        return y_min, y_max
+
+    def set_sweep_y_range(self, graph_index, state, y_min, y_max):
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+        state["extrema"] = (y_min, y_max)
+        if not np.isfinite(y_min) or y_min == y_max:
+            y_min, y_max = (y_min - 1, y_max + 1) if np.isfinite(y_min) else (-1, 1)
+        plot_widget.setLimits(xMin=0, xMax=state["window"], yMin=y_min, yMax=y_max)
+        plot_widget.setYRange(y_min, y_max, padding=0.1)
+
+    def setup_sweep(self, graph_index, rows, signal_index):
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+        plot_widget.clear()
+
+        window = self.window_seconds
+        state = {
+            "rows": rows,
+            "index": signal_index,
+            "time": self.playhead_time(graph_index, signal_index),
+            "window": window,
+            # Sweeps start at multiples of the window from the earliest first sample
+            "origin": min(
+                (
+                    float(self.imported_signals[i][0].time_index.time_at(0))
+                    for i in rows
+                ),
+                default=0.0,
+            ),
+            "signals": {},
+            "erase_bar": pg.InfiniteLine(angle=90, pen=pg.mkPen("w", width=2)),
+        }
+
+        # The sweep window never moves, so the X range is set once
+        for i in rows:
+            signal_data = self.imported_signals[i][0]
+            # One cell per sample period across the window, so signals sampled at
+            # different rates sweep at the same speed
+            period = signal_data.time_index.period
+            cells = max(2, int(np.ceil(window / period - 1e-6)))
+            segment = int(np.ceil(cells / self.sweep_segments))
+            pen = pg.mkPen(self.signal_colors[i])
+            curves = []
+            for _ in range(0, cells, segment):
+                curve = pg.PlotCurveItem(pen=pen, connect="finite")
+                plot_widget.addItem(curve)
+                curves.append(curve)
+            state["signals"][i] = {
+                "period": period,
+                "cells": cells,
+                "segment": segment,
+                "buffer": np.full(cells, np.nan),
+                "curves": curves,
+            }
+
+        plot_widget.enableAutoRange(False)
+        plot_widget.setXRange(0, window, padding=0)
+        self.set_sweep_y_range(
+            graph_index, state, *self.sweep_extrema(rows, state["time"])
+        )
+        plot_widget.addItem(state["erase_bar"])
+
+        # Fill in the samples of the current sweep that are already played
+        self.write_sweep(state, state["time"] - window, state["time"])
+        self.sweep_state[graph_index] = state
+        self.redraw_sweep_segments(
+            graph_index,
+            state,
+            {i: range(len(signal["curves"])) for i, signal in state["signals"].items()},
+        )
+
+    def sweep_cells(self, times, state, signal):
+        # Cell of each time within the sweep window. Times are rounded to the signal's
+        # sample slots since the origin, and each sweep starts at the first slot at or
+        # after its start time, so consecutive samples always get consecutive cells, also
+        # when the window isn't a whole number of periods. (Flooring the time / period
+        # quotient put 0.275 / 0.00025 = 1099.999... in cell 1099, next to its neighbour.)
+        period, window = signal["period"], state["window"]
+        slots = np.rint((times - state["origin"]) / period)
+        sweeps = np.floor((slots + 1e-6) * period / window)
+        first_slots = np.ceil(sweeps * window / period - 1e-6)
+        return np.clip(slots - first_slots, 0, signal["cells"] - 1).astype(np.int64)
+
+    def write_sweep(self, state, previous, playhead):
+        # Write the samples played in (previous, playhead] in place and blank the gap
+        # ahead of the cursor, returns the dirty segments of each signal
+        window = state["window"]
+        gap = window / 20
+        restart = previous <= playhead - window + gap
+        previous = max(previous, playhead - window + gap)
+
+        dirty_segments = {}
+        for i, signal in state["signals"].items():
+            signal_data = self.imported_signals[i][0]
+            time_index = signal_data.time_index
+            cells, buffer = signal["cells"], signal["buffer"]
+
+            if restart:
+                # A whole window passed, nothing shown is current any more
+                erased = np.arange(cells)
+            else:
+                erase_from, erase_to = self.sweep_cells(
+                    np.array([previous + gap, playhead + gap]), state, signal
+                )
+                erased = (
+                    erase_from + 1 + np.arange((erase_to - erase_from) % cells)
+                ) % cells
+            buffer[erased] = np.nan
+
+            # Cells are picked by timestamp, so samples missing in a gap leave theirs blank
+            first = time_index.index_at(previous, side="right")
+            stop = min(len(signal_data), time_index.index_at(playhead, side="right"))
+            positions = self.sweep_cells(
+                time_index.time_at(np.arange(first, stop)), state, signal
+            )
+            buffer[positions] = np.asarray(signal_data[first:stop])
+
+            # A cell on a segment boundary is also the last point of the previous segment
+            changed = np.concatenate((positions, erased))
+            segment = signal["segment"]
+            boundary = changed[(changed % segment == 0) & (changed > 0)]
+            dirty_segments[i] = np.unique(
+                np.concatenate((changed // segment, boundary // segment - 1))
+            )
+
+        state["erase_bar"].setValue((playhead - state["origin"]) % window)
+        return dirty_segments
+
+    def redraw_sweep_segments(self, graph_index, state, dirty_segments):
+        info_table = (
+            self.signals_info_table_1 if graph_index == 0 else self.signals_info_table_2
+        )
+        for i, signal in state["signals"].items():
+            visibility_checkbox = info_table.cellWidget(i, 3)
+            visible = visibility_checkbox is None or visibility_checkbox.isChecked()
+            segment, buffer = signal["segment"], signal["buffer"]
+            for k in dirty_segments[i]:
+                curve = signal["curves"][k]
+                curve.setVisible(visible)
+                lo = k * segment
+                hi = min(lo + segment + 1, signal["cells"])
+                curve.setData(
+                    x=np.arange(lo, hi) * signal["period"],
+                    y=buffer[lo:hi],
+                    connect="finite",
+                )
+
+    def window_changed(self, value):
+        # Sweeps are rebuilt for the new window on their next tick
+        self.window_seconds = value
+
     # --- Update The Signals Information Table --- #
     # -------------------------------------------- #
 
+    # --- Overview Strips --- #
+    # ---------------------- #
+    def create_overview_widget(self):
+        overview_widget = pg.PlotWidget()
+        overview_widget.setBackground("black")
+        overview_widget.setFixedHeight(70)
+        overview_widget.hideAxis("left")
+        overview_widget.setMouseEnabled(x=False, y=False)
+        overview_widget.setMenuEnabled(False)
+        overview_widget.hideButtons()
+        return overview_widget
+
+    def refresh_overview(self, graph_index):
+        # Redraw a graph's strip from the precomputed envelopes of its signals
+        overview_widget = self.graph_map[graph_index]["overview"]
+        overview_region = self.graph_map[graph_index]["overview_region"]
+        overview_widget.clear()
+        first_time, last_time = np.inf, -np.inf
+        for i, (signal_data, graph_number) in enumerate(self.imported_signals):
+            if graph_number == graph_index:
+                overview = self.signal_overviews[i]
+                time_index = signal_data.time_index
+                t_data, y_data = time_index.to_display(*overview.curve_data())
+                overview_widget.plot(
+                    x=t_data,
+                    y=y_data,
+                    pen=pg.mkColor(self.signal_colors[i]),
+                    connect="finite",
+                )
+                first_time = min(first_time, float(time_index.time_at(0)))
+                last_time = max(
+                    last_time,
+                    float(time_index.time_at(max(1, overview.total_length) - 1))
+                    + time_index.period,
+                )
+        if not np.isfinite(first_time):
+            first_time, last_time = 0, 1
+        overview_widget.setXRange(first_time, last_time, padding=0)
+        overview_widget.addItem(overview_region)
+        # Clamping the region to the new bounds is not a drag, the playhead stays put
+        self.syncing_overview = True
+        try:
+            overview_region.setBounds((first_time, last_time))
+        finally:
+            self.syncing_overview = False
+
+    def extend_overview(self, graph_index):
+        # Signals still being published by an acquisition worker grow their envelope
+        changed = False
+        for i, (_, graph_number) in enumerate(self.imported_signals):
+            if graph_number == graph_index:
+                changed = self.signal_overviews[i].update() or changed
+        if changed:
+            self.refresh_overview(graph_index)
+
+    def sync_overview_region(self, graph_index):
+        if self.sweep_mode:
+            # The sweep's X axis is local to the window, the region covers the window of
+            # time ending at the playhead
+            state = self.sweep_state[graph_index]
+            if state is None:
+                return
+            x_range = (state["time"] - state["window"], state["time"])
+        else:
+            plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+            x_range, _ = plot_widget.plotItem.getViewBox().viewRange()
+        self.syncing_overview = True
+        try:
+            self.graph_map[graph_index]["overview_region"].setRegion(x_range)
+        finally:
+            self.syncing_overview = False
+
+    def overview_region_changed(self, graph_index):
+        # Re-point the graph at the dragged region, the cine continues from its end
+        if self.syncing_overview:
+            return
+        signal_data = self.signal_data_1 if graph_index == 0 else self.signal_data_2
+        if len(signal_data) == 0:
+            return
+        lo, hi = self.graph_map[graph_index]["overview_region"].getRegion()
+        signal_index = min(
+            len(signal_data), max(1, signal_data.time_index.index_at(hi, side="right"))
+        )
+        if graph_index == 0:
+            self.signal_index_1 = signal_index
+        else:
+            self.signal_index_2 = signal_index
+        self.publish_playhead(graph_index)
+
+        plot_widget = self.plot_widget_1 if graph_index == 0 else self.plot_widget_2
+        self.syncing_overview = True
+        try:
+            if self.sweep_mode:
+                self.sweep_graph(graph_index, signal_index)
+            elif self.graph_map[graph_index]["timer"].isActive():
+                self.draw_graph(graph_index, signal_index)
+            else:
+                self.draw_graph(graph_index, signal_index, view_range=(lo, hi))
+                plot_widget.setXRange(lo, hi, padding=0)
+        except Exception as e:
+            print(f"Error navigating graph {graph_index + 1}: {e}")
+        finally:
+            self.syncing_overview = False
+
+    # --- Signal Server --- #
+    # --------------------- #
+    def serve_signals_toggled(self, checked):
+        if not checked:
+            if self.signal_server is not None:
+                self.signal_server.close()
+                self.signal_server = None
+                print("Stopped serving signals.")
+            return
+        try:
+            # asyncio and the server are only loaded once serving is switched on
+            SignalServer = startup_timing.lazy_import("signal_server").SignalServer
+            self.signal_server = SignalServer(self.tile_cache)
+            self.signal_server.start()
+        except Exception as e:
+            print(f"Error starting the signal server: {e}")
+            self.signal_server = None
+            self.serve_signals_action.setChecked(False)
+            return
+        self.publish_channels()
+        self.publish_playhead(0)
+        self.publish_playhead(1)
+        print(f"Serving signals on localhost:{self.signal_server.port}")
+
+    def publish_channels(self):
+        if self.signal_server is None:
+            return
+        channels = []
+        for row, (file_path, graph_number) in enumerate(self.imported_files):
+            signal_data = self.imported_signals[row][0]
+            channels.append(
+                (
+                    row,
+                    file_path.split("/")[-1],
+                    graph_number,
+                    self.signal_cache_ids[row],
+                    signal_data.time_index,
+                )
+            )
+        self.signal_server.set_channels(channels)
+
+    def publish_playhead(self, graph_index):
+        # Subscribers follow the playhead time of each graph
+        if self.signal_server is None:
+            return
+        signal_data = self.signal_data_1 if graph_index == 0 else self.signal_data_2
+        if len(signal_data) == 0:
+            return
+        signal_index = self.signal_index_1 if graph_index == 0 else self.signal_index_2
+        self.signal_server.publish(
+            graph_index, self.playhead_time(graph_index, signal_index)
+        )
+
     def update_signal_list(self):
         self.signals_info_table_1.setRowCount(len(self.table_1))
         self.signals_info_table_2.setRowCount(len(self.imported_files))
@@ -490,6 +1232,11 @@ class SignalViewer(QMainWindow):
                     color_label,
                 )
 
+        # The overview strips follow the signals on each graph
+        self.refresh_overview(0)
+        self.refresh_overview(1)
+        self.publish_channels()
+
     def fill_table_row(self, row, table, name, graph, color):
         table.setItem(row, 0, name)  # Display file name
         table.setItem(row, 1, graph)  # Display graph number
@@ -521,7 +1268,7 @@ class SignalViewer(QMainWindow):
                             == 1
                         ):
                             self.graph_map[graph_number]["timer"].start(60)
-                        data_items[row].setPen("black")
+                        data_items[row].setVisible(True)
                     else:
                         # If the checkbox is unchecked, pause the timer and hide the signal
                         if (
@@ -529,7 +1276,7 @@ class SignalViewer(QMainWindow):
                             == 1
                         ):
                             self.graph_map[graph_number]["timer"].stop()
-                        data_items[row].setPen(None)
+                        data_items[row].setVisible(False)
 
     def number_of_signals_in_graph(self, graph_number):
         count = 0
@@ -577,9 +1324,15 @@ class SignalViewer(QMainWindow):
                         QBrush(color)
                     )
 
-                selected_graph = self.graph_selector.currentIndex()
-                selected_plot = self.graph_map[selected_graph]["plot"]
-                selected_plot.clear()  # Clear the existing plot
+                # Recolor the signal's curve on its graph, and its sweep segments
+                curve = self.graph_curves[graph_number].get(current_row)
+                if curve is not None:
+                    curve.setPen(pg.mkPen(color.name()))
+                state = self.sweep_state[graph_number]
+                if state is not None and current_row in state["signals"]:
+                    for curve in state["signals"][current_row]["curves"]:
+                        curve.setPen(pg.mkPen(color.name()))
+                self.refresh_overview(graph_number)
 
     def ensure_signal_colors_length(self, num_signals):
         if len(self.signal_colors) < num_signals:
@@ -852,118 +1605,311 @@ class SignalViewer(QMainWindow):
         selected_graph = (
             self.graph_selector.currentIndex()
         )  # assuming graph_selector is a QComboBox
+        signal_index = (
+            self.signal_index_1 if selected_graph == 0 else self.signal_index_2
+        )
 
-        # Find all the signal data for the selected graph number
+        # Find all the signals on the selected graph, up to where they have played
         selected_signals = []
-
-        for _, graph_number in self.imported_files:
-            if graph_number == selected_graph:
-                if selected_graph == 0:
-                    selected_signals.append(self.signal_data_1[: self.signal_index_1])
-                elif selected_graph == 1:
-                    selected_signals.append(self.signal_data_2[: self.signal_index_2])
+        if signal_index > 0:
+            playhead = self.playhead_time(selected_graph, signal_index)
+        for row, (file_path, graph_number) in enumerate(self.imported_files):
+            if graph_number == selected_graph and signal_index > 0:
+                signal_data = self.imported_signals[row][0]
+                played = signal_data.time_index.index_at(playhead, side="right")
+                selected_signals.append(
+                    (
+                        file_path.split("/")[-1],
+                        self.signal_colors[row],
+                        signal_data,
+                        min(played, len(signal_data)),
+                    )
+                )
 
         if selected_signals:
-            # Get or create a document file for snapshots
-            snapshot_doc_path = "signal_snapshots.docx"
-            if os.path.exists(snapshot_doc_path):
-                doc = Document(snapshot_doc_path)
-            else:
-                doc = Document()
-                doc.add_heading("Signal Snapshots", level=1)
-
-            # Prompt the user to choose a directory for saving the file
-            options = QFileDialog.Options()
-            options |= QFileDialog.ReadOnly
-            file_dialog = QFileDialog(self)
-            file_dialog.setFileMode(QFileDialog.DirectoryOnly)
-            selected_dir = file_dialog.getExistingDirectory(
-                self, "Select Directory", "", options=options
+            # Keep the visible window, decimated, and the statistics for the report
+            plot_widget = (
+                self.plot_widget_1 if selected_graph == 0 else self.plot_widget_2
+            )
+            x_min, x_max = plot_widget.viewRange()[0]
+            self.report_snapshots.append(
+                Snapshot(selected_graph, selected_signals, x_min, min(x_max, playhead))
             )
+            print(
+                f"Snapshot {len(self.report_snapshots)} added to the report, "
+                "use Generate PDF Report to save it."
+            )
+        else:
+            print(f"No signals found for graph {selected_graph}.")
 
-            if selected_dir:
-                # Create a new document or open an existing one
-                file_path = os.path.join(selected_dir, "signal_snapshot.docx")
-                if not os.path.exists(file_path):
-                    doc = Document()
-                    doc.add_heading("Signal Snapshots", level=1)
-                else:
-                    doc = Document(file_path)
+    def export_cine_event(self):
+        if not self.imported_signals:
+            print("No signals to export.")
+            return
 
-                # Export the plot_widget_1 or plot_widget_2 scene to a PNG file
-                if selected_graph == 0:
-                    exporter = pg.exporters.ImageExporter(
-                        self.plot_widget_1.getPlotItem()
-                    )
-                elif selected_graph == 1:
-                    exporter = pg.exporters.ImageExporter(
-                        self.plot_widget_2.getPlotItem()
-                    )
+        # Ask for the range, frame rate, resolution and output format
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Export Cine")
+        form = QFormLayout(dialog)
 
-                temp_file_path = "temp_snapshot.png"
-                exporter.export(temp_file_path)
-                doc.add_picture(temp_file_path, width=Inches(6))
-                os.remove(temp_file_path)
-
-                # Add signal statistics to the document
-                doc.add_heading("Signal Statistics", level=1)
-                for i, signal_data in enumerate(selected_signals):
-                    signal_stats = self.calculate_signal_stats(signal_data)
-                    doc.add_paragraph(f"Signal {i + 1} Statistics:")
-                    for key, value in signal_stats.items():
-                        doc.add_paragraph(f"{key}: {value:.2f}")
-
-                # Save the document to the selected directory
-                doc.save(file_path)
-                print(f"Snapshot added to the document and saved to: {file_path}")
-        else:
-            print(f"No signals found for graph {selected_graph}.")
+        graph_choice = QComboBox()
+        graph_choice.addItems(["Graph 1", "Graph 2", "Both Graphs"])
+        graph_choice.setCurrentIndex(self.graph_selector.currentIndex())
 
-    def convert_to_pdf(self):
-        # Prompt the user to choose an existing DOCX file
-        options = QFileDialog.Options()
-        options |= QFileDialog.ReadOnly
-        file_dialog = QFileDialog(self)
-        selected_file, _ = file_dialog.getOpenFileName(
+        # The range is in seconds, from the current playhead to the end of the longest signal
+        last_time = max(
+            float(signal_data.time_index.time_at(len(signal_data) - 1))
+            for signal_data, _ in self.imported_signals
+        )
+        start_box = QDoubleSpinBox()
+        start_box.setDecimals(4)
+        start_box.setRange(0, last_time)
+        start_box.setSuffix(" s")
+        signal_data = (
+            self.signal_data_1 if self.current_graph == 0 else self.signal_data_2
+        )
+        if signal_data is not None:
+            signal_index = (
+                self.signal_index_1 if self.current_graph == 0 else self.signal_index_2
+            )
+            start_box.setValue(self.playhead_time(self.current_graph, signal_index))
+        stop_box = QDoubleSpinBox()
+        stop_box.setDecimals(4)
+        stop_box.setRange(0, last_time)
+        stop_box.setSuffix(" s")
+        stop_box.setValue(last_time)
+
+        fps_box = QSpinBox()
+        fps_box.setRange(1, 120)
+        fps_box.setValue(30)
+        width_box = QSpinBox()
+        width_box.setRange(160, 3840)
+        width_box.setValue(1280)
+        height_box = QSpinBox()
+        height_box.setRange(120, 2160)
+        height_box.setValue(720)
+
+        format_choice = QComboBox()
+        format_choice.addItem("PNG Image Sequence")
+        if find_video_encoder():
+            format_choice.addItem("MP4 Video")
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        form.addRow("Graph:", graph_choice)
+        form.addRow("From:", start_box)
+        form.addRow("To:", stop_box)
+        form.addRow("Frames per second:", fps_box)
+        form.addRow("Width:", width_box)
+        form.addRow("Height:", height_box)
+        form.addRow("Format:", format_choice)
+        form.addRow(buttons)
+
+        if dialog.exec_() != QDialog.Accepted or stop_box.value() <= start_box.value():
+            return
+
+        video = format_choice.currentIndex() == 1
+        output_path, _ = QFileDialog.getSaveFileName(
             self,
-            "Select DOCX File to Convert to PDF",
-            "",
-            "DOCX Files (*.docx)",
-            options=options,
+            "Export Cine",
+            "cine.mp4" if video else "cine.png",
+            "MP4 Video (*.mp4)" if video else "PNG Images (*.png)",
         )
+        if not output_path:
+            return
 
-        if selected_file:
-            # Generate PDF from the selected DOCX file
-            pdf_file = selected_file.replace(".docx", ".pdf")
-            convert(selected_file, pdf_file)
-            print(f"PDF report generated successfully: {pdf_file}")
-        else:
-            print("PDF generation canceled. Please select a DOCX file to convert.")
+        graphs = (
+            [0, 1]
+            if graph_choice.currentIndex() == 2
+            else [graph_choice.currentIndex()]
+        )
+        panels = []
+        for graph_index in graphs:
+            panels.append(
+                [
+                    (signal_data, self.signal_colors[i])
+                    for i, (signal_data, graph_number) in enumerate(
+                        self.imported_signals
+                    )
+                    if graph_number == graph_index
+                ]
+            )
 
-    def calculate_signal_stats(self, signal_data):
-        selected_graph = self.graph_selector.currentIndex()
-        if signal_data is not None:
-            mean_value = np.mean(signal_data)
-            std_deviation = np.std(signal_data)
-            duration = len(
-                signal_data
-            )  # Assuming the duration is the length of the signal
-            min_value = np.min(signal_data)
-            max_value = np.max(signal_data)
-            return {
-                "Mean": mean_value,
-                "Standard Deviation": std_deviation,
-                "Duration": duration,
-                "Min Value": min_value,
-                "Max Value": max_value,
-            }
+        # Export at the cine speed of the first exported graph, one sample of its signal per
+        # timer tick, and with the window shown on screen
+        interval = self.graph_map[graphs[0]]["timer"].interval() or 60
+        signal_data = self.signal_data_1 if graphs[0] == 0 else self.signal_data_2
+        period = signal_data.time_index.period if signal_data is not None else 1.0
+        exporter = CineExporter(
+            panels,
+            start_box.value(),
+            stop_box.value(),
+            output_path,
+            fps=fps_box.value(),
+            width=width_box.value(),
+            height=height_box.value(),
+            speed=period * 1000 / interval,
+            window=self.window_seconds,
+            video=video,
+        )
+        exporter.start_export()
+        self.show_task_progress(
+            exporter,
+            "Exporting cine...",
+            lambda: print(f"Cine exported successfully: {output_path}"),
+        )
 
-    def get_signal_stats(self, selected_graph):
-        if selected_graph == 0:
-            signal_data = self.signal_data_1
-        elif selected_graph == 1:
-            signal_data = self.signal_data_2
-        return self.calculate_signal_stats(signal_data)
+    def export_range_event(self):
+        if not self.imported_signals:
+            print("No signals to export.")
+            return
+
+        # Ask for the signals, the sample range and the file format
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Export Range")
+        form = QFormLayout(dialog)
+
+        # Every signal is listed, those on the selected graph are checked
+        signal_list = QListWidget()
+        for file_path, graph_number in self.imported_files:
+            item = QListWidgetItem(
+                f"{file_path.split('/')[-1]} (Graph {graph_number + 1})"
+            )
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(
+                Qt.Checked if graph_number == self.current_graph else Qt.Unchecked
+            )
+            signal_list.addItem(item)
+
+        # The range is in seconds, each signal exports its own samples in it; it defaults
+        # to the times the selected graph is showing
+        first_time = min(
+            float(signal_data.time_index.time_at(0))
+            for signal_data, _ in self.imported_signals
+        )
+        last_time = max(
+            float(signal_data.time_index.time_at(len(signal_data) - 1))
+            for signal_data, _ in self.imported_signals
+        )
+        plot_widget = (
+            self.plot_widget_1 if self.current_graph == 0 else self.plot_widget_2
+        )
+        x_min, x_max = plot_widget.viewRange()[0]
+        start_box = QDoubleSpinBox()
+        start_box.setDecimals(4)
+        start_box.setRange(first_time, last_time)
+        start_box.setSuffix(" s")
+        start_box.setValue(x_min)
+        stop_box = QDoubleSpinBox()
+        stop_box.setDecimals(4)
+        stop_box.setRange(first_time, last_time)
+        stop_box.setSuffix(" s")
+        stop_box.setValue(x_max)
+
+        format_choice = QComboBox()
+        format_choice.addItems(list(EXPORT_FORMATS))
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        form.addRow("Signals:", signal_list)
+        form.addRow("From:", start_box)
+        form.addRow("To:", stop_box)
+        form.addRow("Format:", format_choice)
+        form.addRow(buttons)
+
+        if dialog.exec_() != QDialog.Accepted or stop_box.value() <= start_box.value():
+            return
+
+        signals = [
+            (
+                os.path.splitext(self.imported_files[i][0].split("/")[-1])[0],
+                self.imported_signals[i][0],
+            )
+            for i in range(signal_list.count())
+            if signal_list.item(i).checkState() == Qt.Checked
+        ]
+        if not signals:
+            print("No signals selected for export.")
+            return
+
+        fmt = format_choice.currentText()
+        extension = EXPORT_FORMATS[fmt]
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Range", "signals" + extension, f"{fmt} (*{extension})"
+        )
+        if not output_path:
+            return
+
+        exporter = RangeExporter(
+            signals, start_box.value(), stop_box.value(), output_path, fmt
+        )
+        if exporter.n_samples == 0:
+            print("No samples in the selected range.")
+            return
+        exporter.start_export()
+        self.show_task_progress(
+            exporter,
+            "Exporting range...",
+            lambda: print(f"Range exported successfully: {output_path}"),
+        )
+
+    def show_task_progress(self, task, label, on_finished):
+        # Poll a background task and mirror its progress in a progress dialog
+        done, total = task.progress()
+        progress_dialog = QProgressDialog(label, "Cancel", 0, max(1, total), self)
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.canceled.connect(task.cancel)
+
+        poll_timer = QTimer(self)
+
+        def poll():
+            done, total = task.progress()
+            progress_dialog.setValue(min(done, total))
+            if task.is_running():
+                return
+            poll_timer.stop()
+            progress_dialog.reset()
+            if task.error is not None:
+                print(f"Error: {task.error}")
+            elif not task.cancel_event.is_set():
+                on_finished()
+
+        poll_timer.timeout.connect(poll)
+        poll_timer.start(100)
+
+    def generate_pdf_report(self):
+        if not self.report_snapshots:
+            print("No snapshots to report. Use Take Snapshot first.")
+            return
+
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "Generate PDF Report", "signal_report.pdf", "PDF Files (*.pdf)"
+        )
+        if not output_path:
+            print("PDF generation canceled.")
+            return
+
+        writer = PdfReportWriter(self.report_snapshots, output_path)
+        writer.start_export()
+        self.show_task_progress(
+            writer,
+            "Generating PDF report...",
+            lambda: print(f"PDF report generated successfully: {output_path}"),
+        )
+
+    def closeEvent(self, event):
+        if self.signal_server is not None:
+            self.signal_server.close()
+        self.frame_preparer.close()
+        self.tile_cache.close()
+        if self.acquisition is not None:
+            self.acquisition.shutdown()
+        super().closeEvent(event)
 
     def openDocumentation(self):
         # Open the specified URL in the default web browser
@@ -971,6 +1917,7 @@ class SignalViewer(QMainWindow):
 
 
 if __name__ == "__main__":
+    startup_timing.milestone("Imports done")
     app = QApplication(sys.argv)
 
     with open("Diffnes.qss", "r") as f:
@@ -979,4 +1926,17 @@ if __name__ == "__main__":
 
     window = SignalViewer()
     window.show()
+    startup_timing.milestone("Window shown")
+
+    def first_frame():
+        startup_timing.milestone("First frame")
+        startup_timing.stop_import_timing()
+        if startup_timing.REPORT_ENABLED:
+            startup_timing.report()
+        # Load the file readers in the background so the first import doesn't stall
+        if "--no-warm-up" not in sys.argv:
+            startup_timing.warm_up(["pandas", "wfdb"])
+
+    # Runs once the event loop has painted the window for the first time
+    QTimer.singleShot(0, first_frame)
     sys.exit(app.exec_())
@@ -0,0 +1,237 @@
+"""
+****************************************************************************************************
+    * @file	    :   acquisition.py
+    * @brief	:   Acquisition worker processes publishing samples through shared-memory rings
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from signal_storage import ScaledSignal, read_signal_file
+
+HEADER_BYTES = 64  # write sequence counter, finished flag, padding
+
+
+class SharedRingBuffer:
+    """
+    A single-writer ring of samples in shared memory. The header holds the total number of
+    samples ever written; the writer copies the data first and bumps the counter last, so a
+    reader only needs the counter to know which samples are valid, no messages are exchanged.
+    """
+
+    def __init__(self, shm, capacity, dtype):
+        self.shm = shm
+        self.name = shm.name
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.header = np.ndarray((2,), dtype=np.int64, buffer=shm.buf)
+        self.data = np.ndarray(
+            (capacity,), dtype=self.dtype, buffer=shm.buf, offset=HEADER_BYTES
+        )
+
+    @classmethod
+    def create(cls, capacity, dtype):
+        nbytes = HEADER_BYTES + capacity * np.dtype(dtype).itemsize
+        ring = cls(
+            shared_memory.SharedMemory(create=True, size=nbytes), capacity, dtype
+        )
+        ring.header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity, dtype):
+        return cls(shared_memory.SharedMemory(name=name), capacity, dtype)
+
+    # --- Writer Side --- #
+    # ------------------- #
+    def write(self, samples):
+        written = int(self.header[0])
+        samples = samples[-self.capacity :]
+        position = written % self.capacity
+        first = min(len(samples), self.capacity - position)
+        self.data[position : position + first] = samples[:first]
+        self.data[: len(samples) - first] = samples[first:]
+        # Publish only after the samples are in place
+        self.header[0] = written + len(samples)
+
+    def finish(self):
+        self.header[1] = 1
+
+    # --- Reader Side --- #
+    # ------------------- #
+    @property
+    def written(self):
+        return int(self.header[0])
+
+    @property
+    def finished(self):
+        return bool(self.header[1])
+
+    def read(self, start, stop):
+        # Samples [start, stop) by absolute index, a zero-copy view unless the range wraps
+        written = self.written
+        if start < written - self.capacity or stop > written:
+            raise IndexError(f"Samples {start}-{stop} are not in the ring buffer")
+        if stop <= start:
+            return self.data[:0]
+        lo, hi = start % self.capacity, (stop - 1) % self.capacity + 1
+        if lo < hi:
+            return self.data[lo:hi]
+        return np.concatenate((self.data[lo:], self.data[:hi]))
+
+    def close(self):
+        # Views handed out to the GUI may still be alive at shutdown
+        self.header = self.data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class AcquiredSignal:
+    # Raw samples published so far by an acquisition worker, sliced by absolute index
+    def __init__(self, ring):
+        self.ring = ring
+
+    def __len__(self):
+        return self.ring.written
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return self.ring.read(start, max(start, stop))[::step]
+        if index < 0:
+            index += len(self)
+        return self.ring.read(index, index + 1)[0]
+
+    @property
+    def nbytes(self):
+        return self.ring.capacity * self.ring.dtype.itemsize
+
+    @property
+    def total_length(self):
+        return self.ring.capacity
+
+
+def acquisition_worker(file_path, status_queue, stop_event, chunk_size):
+    # Runs in its own process: decode the source and publish it into a shared ring
+    ring = None
+    reported = False  # The viewer gets exactly one status message per worker
+    try:
+        signal_data = read_signal_file(file_path)
+        # The viewer seeks, rewinds and draws overviews over the whole recording, so the
+        # ring holds all of it and never wraps; a live source would size it to the history
+        # it keeps instead
+        ring = SharedRingBuffer.create(max(1, len(signal_data)), signal_data.raw.dtype)
+        status_queue.put(
+            {
+                "file_path": file_path,
+                "name": ring.name,
+                "capacity": ring.capacity,
+                "dtype": ring.dtype.str,
+                "gain": signal_data.gain,
+                "baseline": signal_data.baseline,
+                "invalid_value": signal_data.invalid_value,
+                "units": signal_data.units,
+                "fs": signal_data.fs,
+                "time_index": signal_data.time_index,
+            }
+        )
+        reported = True
+        for start in range(0, len(signal_data), chunk_size):
+            if stop_event.is_set():
+                break
+            ring.write(signal_data.raw[start : start + chunk_size])
+        ring.finish()
+        # Done: the viewer owns the shared memory from here on and unlinks it on close,
+        # the worker exits and frees its copy of the samples
+    except Exception as e:
+        if not reported:
+            status_queue.put({"file_path": file_path, "error": str(e)})
+        else:
+            # The viewer already shows the signal, it just stops growing
+            print(f"Error publishing {file_path}: {e}")
+    finally:
+        if ring is not None:
+            ring.close()
+            if not reported:
+                # The viewer never learned the name, nobody else can free it
+                ring.unlink()
+
+
+class AcquisitionManager:
+    """
+    Starts one worker process per source and turns the rings they publish into signals the
+    viewer can slice. Setup details travel once over a queue; samples only through the rings.
+    A worker exits once its ring is complete, the rings reported to the viewer are closed
+    and unlinked by the manager on shutdown.
+    """
+
+    def __init__(self, chunk_size=1 << 16):
+        self.chunk_size = chunk_size
+        # Spawned, not forked, so workers never inherit the Qt state of the GUI process
+        self.context = multiprocessing.get_context("spawn")
+        self.status_queue = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.workers = []
+        self.rings = []
+        self.pending = 0  # Workers that haven't reported their ring yet
+
+    def start(self, file_path):
+        worker = self.context.Process(
+            target=acquisition_worker,
+            args=(file_path, self.status_queue, self.stop_event, self.chunk_size),
+            name=f"acquisition-{len(self.workers)}",
+            daemon=True,
+        )
+        worker.start()
+        self.workers.append(worker)
+        self.pending += 1
+
+    def poll(self):
+        # Non-blocking: yields (file_path, signal or None, error) for each new source
+        self.workers = [worker for worker in self.workers if worker.is_alive()]
+        while True:
+            try:
+                status = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.pending -= 1
+            if "error" in status:
+                yield status["file_path"], None, status["error"]
+                continue
+            ring = SharedRingBuffer.attach(
+                status["name"], status["capacity"], status["dtype"]
+            )
+            self.rings.append(ring)
+            signal_data = ScaledSignal(
+                AcquiredSignal(ring),
+                gain=status["gain"],
+                baseline=status["baseline"],
+                invalid_value=status["invalid_value"],
+                units=status["units"],
+                fs=status["fs"],
+                time_index=status["time_index"],
+            )
+            yield status["file_path"], signal_data, None
+
+    def shutdown(self):
+        # Stop the workers still publishing, then free every reported ring, also those
+        # reported since the last poll
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout=2)
+        for _ in self.poll():
+            pass
+        for ring in self.rings:
+            ring.close()
+            ring.unlink()
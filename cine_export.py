@@ -0,0 +1,221 @@
+"""
+****************************************************************************************************
+    * @file	    :   cine_export.py
+    * @brief	:   Offscreen rendering of cine loops to an image sequence or a video file
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import os
+import shutil
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QTransform
+
+from tile_cache import minmax_envelope, signal_extrema
+
+
+def find_video_encoder():
+    # A local ffmpeg is used for video output, otherwise only image sequences are offered
+    return shutil.which("ffmpeg")
+
+
+class CineExporter:
+    """
+    Renders the cine loop of one or more graphs frame by frame with QPainter on QImages, without
+    the playback timer. Like the graphs, frames show a window of seconds ending at the playhead
+    and place every signal by its own timestamps. Frames are rendered on a thread pool and handed, in order, to the encoder
+    while the next frames are still being drawn. PNG sequences are encoded by the render workers,
+    videos are piped as raw frames to ffmpeg.
+    """
+
+    def __init__(
+        self,
+        panels,
+        start,
+        stop,
+        output_path,
+        fps=30,
+        width=1280,
+        height=720,
+        speed=1.0,
+        window=1.0,
+        video=False,
+    ):
+        # panels: one list of (signal_data, color) per graph, stacked top to bottom, start,
+        # stop and window in seconds
+        self.panels = panels
+        self.start = float(start)
+        self.stop = float(stop)
+        self.output_path = output_path
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.window = window
+        self.video = video
+
+        # Playback advances speed seconds of signal per second of cine time
+        self.step = speed / fps
+        self.n_frames = int((self.stop - self.start) / self.step) + 1
+
+        self._y_ranges = None
+        self.frames_done = 0
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    # --- Rendering --- #
+    # ----------------- #
+    def y_ranges(self):
+        # A fixed Y range per panel over the whole export keeps the frames steady
+        ranges = []
+        for signals in self.panels:
+            y_min, y_max = np.inf, -np.inf
+            for signal_data, _ in signals:
+                time_index = signal_data.time_index
+                lo = time_index.index_at(self.start - self.window)
+                hi = min(len(signal_data), time_index.index_at(self.stop, side="right"))
+                y_min, y_max = signal_extrema(signal_data, lo, hi, y_min, y_max)
+            if not np.isfinite(y_min) or y_min == y_max:
+                y_min, y_max = (y_min - 1, y_max + 1) if np.isfinite(y_min) else (-1, 1)
+            padding = 0.1 * (y_max - y_min)
+            ranges.append((y_min - padding, y_max + padding))
+        return ranges
+
+    def render_frame(self, frame_index):
+        playhead = self.start + frame_index * self.step
+        image = QImage(self.width, self.height, QImage.Format_RGB32)
+        image.fill(QColor("black"))
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        panel_height = self.height / len(self.panels)
+
+        for panel_index, signals in enumerate(self.panels):
+            y_min, y_max = self._y_ranges[panel_index]
+            top = panel_index * panel_height
+            painter.setPen(QPen(QColor("#404040"), 1))
+            painter.drawRect(QRectF(0, top, self.width - 1, panel_height - 1))
+
+            # Map (time, value) to pixels inside this panel
+            x0 = playhead - self.window
+            transform = QTransform()
+            transform.translate(0, top)
+            transform.scale(self.width / self.window, -panel_height / (y_max - y_min))
+            transform.translate(-x0, -y_max)
+
+            for signal_data, color in signals:
+                # Binary search the signal's timestamps for the samples in the window
+                time_index = signal_data.time_index
+                lo = time_index.index_at(x0)
+                hi = min(len(signal_data), time_index.index_at(playhead, side="right"))
+                if hi - lo < 2:
+                    continue
+                y_data = np.asarray(signal_data[lo:hi], dtype=np.float64)
+                x_data = np.arange(lo, hi, dtype=np.float64)
+
+                # More samples than pixels: draw the min/max envelope instead
+                bucket = (hi - lo) // self.width
+                if bucket > 1:
+                    mins, maxs = minmax_envelope(y_data, bucket)
+                    y_data = np.column_stack((mins, maxs)).ravel()
+                    x_data = np.repeat(x_data[::bucket], 2)
+
+                # Sample positions to seconds, gaps in the timestamps stay undrawn
+                t_data, y_data = time_index.to_display(x_data, y_data)
+                path = transform.map(pg.arrayToQPath(t_data, y_data, connect="finite"))
+                pen = QPen(QColor(color), 1.5)
+                pen.setCosmetic(True)
+                painter.setPen(pen)
+                painter.drawPath(path)
+
+        painter.setPen(QColor("white"))
+        painter.drawText(8, 18, f"{playhead:.3f} s")
+        painter.end()
+
+        if not self.video:
+            image.save(self.frame_path(frame_index), "PNG")
+            return None
+        return image
+
+    def frame_path(self, frame_index):
+        root, _ = os.path.splitext(self.output_path)
+        return f"{root}_{frame_index:06d}.png"
+
+    # --- Export Pipeline --- #
+    # ----------------------- #
+    def start_export(self):
+        self.thread = threading.Thread(target=self.run, name="cine-export", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        encoder = None
+        try:
+            self._y_ranges = self.y_ranges()
+            if self.video:
+                encoder = subprocess.Popen(
+                    [
+                        find_video_encoder(),
+                        "-y",
+                        "-loglevel",
+                        "error",
+                        "-f",
+                        "rawvideo",
+                        "-pix_fmt",
+                        "bgra",
+                        "-s",
+                        f"{self.width}x{self.height}",
+                        "-r",
+                        str(self.fps),
+                        "-i",
+                        "-",
+                        "-pix_fmt",
+                        "yuv420p",
+                        self.output_path,
+                    ],
+                    stdin=subprocess.PIPE,
+                )
+
+            workers = os.cpu_count() or 2
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="cine-render"
+            ) as executor:
+                # Keep a bounded number of frames in flight and consume them in order
+                in_flight = deque()
+                next_frame = 0
+                while self.frames_done < self.n_frames:
+                    if self.cancel_event.is_set():
+                        for future in in_flight:
+                            future.cancel()
+                        break
+                    while next_frame < self.n_frames and len(in_flight) < 2 * workers:
+                        in_flight.append(executor.submit(self.render_frame, next_frame))
+                        next_frame += 1
+                    image = in_flight.popleft().result()
+                    if encoder is not None:
+                        bits = image.constBits()
+                        bits.setsize(image.sizeInBytes())
+                        encoder.stdin.write(bytes(bits))
+                    self.frames_done += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            if encoder is not None:
+                encoder.stdin.close()
+                if encoder.wait() != 0 and self.error is None:
+                    self.error = RuntimeError("ffmpeg failed to encode the video")
+
+    def progress(self):
+        return self.frames_done, self.n_frames
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        self.cancel_event.set()
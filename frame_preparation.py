@@ -0,0 +1,81 @@
+"""
+****************************************************************************************************
+    * @file	    :   frame_preparation.py
+    * @brief	:   Off-GUI-thread preparation of ready-to-draw cine frames
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import threading
+
+
+class FramePreparer:
+    """
+    Prepares the next cine frame of each graph on a worker thread: the decimated time/y buffers
+    of every signal on it from the tile cache, and their Y ranges. The GUI draws the front buffer
+    and, on the next tick, swaps in the back buffer if it was prepared for that frame, so the
+    GUI thread is left with setData calls only.
+    """
+
+    def __init__(self, tile_cache):
+        self.tile_cache = tile_cache
+        self._requests = {}  # graph -> frame arguments to prepare
+        self._back = {}  # graph -> (frame arguments, frame) prepared ahead of time
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="frame-preparation", daemon=True
+        )
+        self._thread.start()
+
+    def prepare(self, sources, max_points):
+        # sources: (row, tile cache id, time index, first sample, stop sample, samples
+        # played) of every signal on the graph
+        frame = []
+        for row, source_id, time_index, start, stop, played in sources:
+            x_data, y_data = self.tile_cache.get_view(
+                source_id, start, stop, max_points
+            )
+            # Samples to seconds, with breaks across gaps in the timestamps
+            t_data, y_data = time_index.to_display(x_data, y_data)
+            # The Y-axis range covers everything played so far
+            y_min, y_max = self.tile_cache.extrema(source_id, played)
+            frame.append((row, t_data, y_data, y_min, y_max))
+        return frame
+
+    def request(self, graph_index, frame_args):
+        # Replaces any older request for the same graph that hasn't started yet
+        with self._condition:
+            self._requests[graph_index] = frame_args
+            self._condition.notify()
+
+    def take(self, graph_index, frame_args):
+        # The prepared frame if it matches, None if the GUI has to prepare it itself
+        with self._condition:
+            back = self._back.get(graph_index)
+            if back is None or back[0] != frame_args:
+                return None
+            del self._back[graph_index]
+            return back[1]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._requests and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                graph_index, frame_args = self._requests.popitem()
+            try:
+                frame = self.prepare(*frame_args)
+            except Exception as e:
+                print(f"Error preparing a frame for graph {graph_index + 1}: {e}")
+                continue
+            with self._condition:
+                self._back[graph_index] = (frame_args, frame)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
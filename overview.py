@@ -0,0 +1,87 @@
+"""
+****************************************************************************************************
+    * @file	    :   overview.py
+    * @brief	:   Precomputed whole-recording min/max envelopes for the overview strips
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import numpy as np
+
+from tile_cache import minmax_envelope
+
+
+class SignalOverview:
+    """
+    The min/max envelope of a whole recording at a fixed number of buckets. It is computed
+    once in chunks when the signal is imported (and extended while an acquisition worker is
+    still publishing), so the overview strip never has to touch the raw samples again.
+    The same pass also summarises every tile_size samples, the tile cache answers running
+    extrema from those tile summaries.
+    """
+
+    def __init__(self, signal_data, resolution=2048, tile_size=4096):
+        self.signal_data = signal_data
+        self.total_length = getattr(signal_data, "total_length", len(signal_data))
+        self.bucket_size = max(1, -(-self.total_length // resolution))
+        n_buckets = -(-self.total_length // self.bucket_size)
+        self.mins = np.full(n_buckets, np.nan)
+        self.maxs = np.full(n_buckets, np.nan)
+        self.tile_size = tile_size
+        n_tiles = -(-self.total_length // tile_size)
+        self.tile_mins = np.full(n_tiles, np.nan)
+        self.tile_maxs = np.full(n_tiles, np.nan)
+        self.upto = 0  # Samples summarised so far
+        self.update()
+
+    def update(self):
+        # Summarise newly available samples, returns True if the envelope changed
+        available = min(len(self.signal_data), self.total_length)
+        stop = available
+        if available < self.total_length:
+            # Only whole buckets until the signal is complete
+            stop -= available % self.bucket_size
+        if stop <= self.upto:
+            return False
+
+        chunk_size = self.bucket_size * max(1, (1 << 20) // self.bucket_size)
+        for start in range(self.upto, stop, chunk_size):
+            end = min(stop, start + chunk_size)
+            chunk = np.asarray(self.signal_data[start:end])
+            mins, maxs = minmax_envelope(chunk, self.bucket_size)
+            first = start // self.bucket_size
+            self.mins[first : first + len(mins)] = mins
+            self.maxs[first : first + len(maxs)] = maxs
+            self.summarise_tiles(chunk, start)
+        self.upto = stop
+        return True
+
+    def summarise_tiles(self, chunk, start):
+        # Chunks needn't start on a tile boundary, a tile split across two chunks gets the
+        # fmin/fmax of both parts (the summaries start as NaN, which fmin/fmax skip)
+        head = min(len(chunk), -start % self.tile_size)
+        if head:
+            tile = start // self.tile_size
+            self.tile_mins[tile] = np.fmin(
+                self.tile_mins[tile], np.fmin.reduce(chunk[:head])
+            )
+            self.tile_maxs[tile] = np.fmax(
+                self.tile_maxs[tile], np.fmax.reduce(chunk[:head])
+            )
+        if len(chunk) > head:
+            mins, maxs = minmax_envelope(chunk[head:], self.tile_size)
+            first = -(-start // self.tile_size)
+            tiles = slice(first, first + len(mins))
+            self.tile_mins[tiles] = np.fmin(self.tile_mins[tiles], mins)
+            self.tile_maxs[tiles] = np.fmax(self.tile_maxs[tiles], maxs)
+
+    def curve_data(self):
+        # Interleaved min/max points, drawn as one curve that fills the envelope
+        n_buckets = -(-self.upto // self.bucket_size)
+        bucket_starts = np.arange(n_buckets, dtype=np.float64) * self.bucket_size
+        x_data = np.column_stack(
+            (bucket_starts, bucket_starts + self.bucket_size / 2)
+        ).ravel()
+        y_data = np.column_stack((self.mins[:n_buckets], self.maxs[:n_buckets])).ravel()
+        return x_data, y_data
@@ -0,0 +1,169 @@
+"""
+****************************************************************************************************
+    * @file	    :   pattern_search.py
+    * @brief	:   FFT-based normalized cross-correlation search for a waveform across signals
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import bisect
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def block_ncc(samples, template_fft, template_norm, template_length, nfft):
+    # Normalized cross-correlation of a zero-mean template against every offset of a block
+    samples = np.nan_to_num(np.asarray(samples, dtype=np.float64))
+    n_valid = len(samples) - template_length + 1
+    if n_valid <= 0:
+        return np.empty(0)
+    samples -= (
+        samples.mean()
+    )  # NCC ignores offsets, this keeps the cumulative sums small
+
+    # The template has zero mean, so correlating with the raw samples gives the numerator
+    numerator = np.fft.irfft(np.fft.rfft(samples, nfft) * template_fft, nfft)[:n_valid]
+
+    # Sliding sum and sum of squares give each window's energy around its mean
+    cumsum = np.concatenate(([0.0], np.cumsum(samples)))
+    cumsum_sq = np.concatenate(([0.0], np.cumsum(samples * samples)))
+    window_sum = cumsum[template_length:] - cumsum[:n_valid]
+    window_sum_sq = cumsum_sq[template_length:] - cumsum_sq[:n_valid]
+    window_energy = window_sum_sq - window_sum * window_sum / template_length
+
+    scores = np.zeros(n_valid)
+    valid = window_energy > 1e-12 * template_length
+    scores[valid] = numerator[valid] / (np.sqrt(window_energy[valid]) * template_norm)
+    return scores
+
+
+def window_peaks(scores, window, threshold):
+    # One candidate per window: the best offset of every window-sized run of scores
+    n_windows = len(scores) // window
+    offsets = []
+    if n_windows:
+        runs = scores[: n_windows * window].reshape(n_windows, window)
+        offsets = np.arange(n_windows) * window + runs.argmax(axis=1)
+    if len(scores) % window:
+        tail_start = n_windows * window
+        offsets = np.append(offsets, tail_start + scores[tail_start:].argmax())
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return offsets[scores[offsets] >= threshold]
+
+
+class PatternSearch:
+    """
+    Finds every occurrence of a template across signals with normalized cross-correlation.
+    Each signal is cut into blocks that overlap by the template length (overlap-save), the
+    blocks are correlated in the frequency domain on a thread pool, and only the per-window
+    peaks above the threshold are kept, so hours of data search in bounded memory.
+    """
+
+    def __init__(
+        self, template, signals, threshold=0.8, max_hits=200, block_size=1 << 18
+    ):
+        # signals: list of (row, signal_data) to search
+        template = np.nan_to_num(np.asarray(template, dtype=np.float64))
+        self.template_length = len(template)
+        self.template = template - template.mean()
+        self.template_norm = np.sqrt(np.sum(self.template**2))
+        self.signals = signals
+        self.threshold = threshold
+        self.max_hits = max_hits
+        self.block_size = max(block_size, 4 * self.template_length)
+
+        self.hits = []  # (score, row, position), best first
+        self.blocks_done = 0
+        self.n_blocks = sum(
+            max(1, -(-len(signal_data) // self.block_size))
+            for _, signal_data in signals
+        )
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start_search(self):
+        self.thread = threading.Thread(
+            target=self.run, name="pattern-search", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        try:
+            if self.template_length < 2 or self.template_norm == 0:
+                raise ValueError("The selected pattern is too short or flat to search")
+
+            m = self.template_length
+            nfft = 1 << (self.block_size + m - 2).bit_length()
+            template_fft = np.conj(np.fft.rfft(self.template, nfft))
+
+            candidates = []
+            with ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 2, thread_name_prefix="pattern-search"
+            ) as executor:
+                futures = []
+                for row, signal_data in self.signals:
+                    for start in range(0, len(signal_data), self.block_size):
+                        futures.append(
+                            executor.submit(
+                                self.search_block,
+                                row,
+                                signal_data,
+                                start,
+                                template_fft,
+                                nfft,
+                            )
+                        )
+                for future in futures:
+                    if self.cancel_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                        return
+                    candidates.extend(future.result())
+                    self.blocks_done += 1
+
+            self.hits = self.suppress_overlaps(candidates)
+        except Exception as e:
+            self.error = e
+
+    def search_block(self, row, signal_data, start, template_fft, nfft):
+        if self.cancel_event.is_set():
+            return []
+        m = self.template_length
+        # Overlap the next block by m - 1 samples so no offset is missed
+        stop = min(len(signal_data), start + self.block_size + m - 1)
+        scores = block_ncc(
+            signal_data[start:stop], template_fft, self.template_norm, m, nfft
+        )
+        offsets = window_peaks(scores, m, self.threshold)
+        return [(float(scores[k]), row, start + int(k)) for k in offsets]
+
+    def suppress_overlaps(self, candidates):
+        # Keep the best hits, never two of the same signal closer than the template length
+        accepted = {}
+        hits = []
+        for score, row, position in sorted(candidates, reverse=True):
+            positions = accepted.setdefault(row, [])
+            k = bisect.bisect_left(positions, position)
+            if k > 0 and position - positions[k - 1] < self.template_length:
+                continue
+            if k < len(positions) and positions[k] - position < self.template_length:
+                continue
+            positions.insert(k, position)
+            hits.append((score, row, position))
+            if len(hits) >= self.max_hits:
+                break
+        return hits
+
+    def progress(self):
+        return self.blocks_done, self.n_blocks
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        self.cancel_event.set()
@@ -0,0 +1,200 @@
+"""
+****************************************************************************************************
+    * @file	    :   pdf_report.py
+    * @brief	:   Snapshots kept in memory and written straight to a multi-page PDF report
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import threading
+import time
+
+import numpy as np
+
+from startup_timing import lazy_import
+from tile_cache import minmax_envelope
+
+STATS_COLUMNS = ["Mean", "Standard Deviation", "Duration (s)", "Min Value", "Max Value"]
+
+
+def signal_stats(signal_data, stop, chunk_size=1 << 20):
+    # Statistics of samples [0, stop) computed chunk by chunk, missing samples are skipped
+    count, total, total_sq = 0, 0.0, 0.0
+    y_min, y_max = np.inf, -np.inf
+    for start in range(0, stop, chunk_size):
+        chunk = np.asarray(
+            signal_data[start : min(stop, start + chunk_size)], np.float64
+        )
+        chunk = chunk[~np.isnan(chunk)]
+        if not len(chunk):
+            continue
+        # Sums around the first sample keep the variance accurate for offset signals
+        if count == 0:
+            offset = chunk[0]
+        chunk = chunk - offset
+        count += len(chunk)
+        total += chunk.sum()
+        total_sq += np.dot(chunk, chunk)
+        y_min = min(y_min, chunk.min() + offset)
+        y_max = max(y_max, chunk.max() + offset)
+    duration = signal_data.time_index.duration(stop)  # Time played so far
+    if count == 0:
+        return dict.fromkeys(STATS_COLUMNS, np.nan) | {"Duration (s)": duration}
+    mean = total / count
+    return {
+        "Mean": mean + offset,
+        "Standard Deviation": np.sqrt(max(0.0, total_sq / count - mean * mean)),
+        "Duration (s)": duration,
+        "Min Value": y_min,
+        "Max Value": y_max,
+    }
+
+
+class Snapshot:
+    """
+    What one Take Snapshot press captured of a graph: the visible window of every signal on
+    it, decimated to a min/max envelope of at most max_points points, and how far each signal
+    had played. The statistics of the played samples scan the whole prefix, so they are only
+    computed when the report is written, on its thread; the prefix never changes afterwards.
+    A report of dozens of snapshots stays a few megabytes.
+    """
+
+    def __init__(self, graph_index, signals, start, stop, max_points=2000):
+        # signals: list of (name, color, signal_data, samples played), start and stop of
+        # the window in seconds
+        self.graph_index = graph_index
+        self.taken = time.localtime()
+        self.start, self.stop = float(start), float(stop)
+        self.traces = []  # (name, color, t, y)
+        self.played = []  # (name, signal_data, samples played)
+        self.stats = None  # (name, stats), filled in by compute_stats
+        for name, color, signal_data, signal_index in signals:
+            x_data, y_data = self.decimate(signal_data, signal_index, max_points)
+            self.traces.append((name, color, x_data, y_data))
+            self.played.append((name, signal_data, signal_index))
+
+    def compute_stats(self):
+        if self.stats is None:
+            self.stats = [
+                (name, signal_stats(signal_data, signal_index))
+                for name, signal_data, signal_index in self.played
+            ]
+        return self.stats
+
+    def decimate(self, signal_data, signal_index, max_points):
+        time_index = signal_data.time_index
+        start = time_index.index_at(self.start)
+        stop = min(signal_index, time_index.index_at(self.stop, side="right"))
+        if stop <= start:
+            return np.empty(0), np.empty(0)
+        samples = np.asarray(signal_data[start:stop], dtype=np.float64)
+        if len(samples) <= max_points:
+            x_data = np.arange(start, stop, dtype=np.float64)
+            return time_index.to_display(x_data, samples)
+        bucket_size = -(-len(samples) // (max_points // 2))
+        mins, maxs = minmax_envelope(samples, bucket_size)
+        bucket_starts = start + bucket_size * np.arange(len(mins), dtype=np.float64)
+        x_data = np.column_stack(
+            (bucket_starts, bucket_starts + bucket_size / 2)
+        ).ravel()
+        return time_index.to_display(x_data, np.column_stack((mins, maxs)).ravel())
+
+
+class PdfReportWriter:
+    """
+    Writes one page per snapshot with matplotlib's PDF backend: the waveforms as vector paths
+    and the statistics as a native table. Each page is written and released before the next
+    one is drawn, so memory does not grow with the number of snapshots.
+    """
+
+    def __init__(self, snapshots, output_path):
+        self.snapshots = list(snapshots)
+        self.output_path = output_path
+        self.pages_done = 0
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start_export(self):
+        self.thread = threading.Thread(target=self.run, name="pdf-report", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            # Figures are used without pyplot, so no GUI backend or global state is involved
+            Figure = lazy_import("matplotlib.figure").Figure
+            PdfPages = lazy_import("matplotlib.backends.backend_pdf").PdfPages
+
+            # One page layout reused for every snapshot, only its contents are swapped,
+            # axes and ticks are far costlier to create than to redraw
+            figure = Figure(figsize=(8.27, 11.69))  # A4 portrait
+            title = figure.suptitle("", fontsize=13)
+            waveform_axes = figure.add_axes([0.1, 0.52, 0.85, 0.36])
+            waveform_axes.set_xlabel("Time (s)")
+            waveform_axes.set_ylabel("Amplitude")
+            waveform_axes.grid(True, linewidth=0.3, alpha=0.5)
+            table_axes = figure.add_axes([0.05, 0.08, 0.9, 0.36])
+            table_axes.axis("off")
+            table_axes.set_title("Signal Statistics", fontsize=11)
+
+            with PdfPages(self.output_path) as pdf:
+                info = pdf.infodict()
+                info["Title"] = "Signal Snapshots"
+                info["Creator"] = "Signal Viewer"
+                for number, snapshot in enumerate(self.snapshots, start=1):
+                    if self.cancel_event.is_set():
+                        return
+                    title.set_text(
+                        f"Snapshot {number} - Graph {snapshot.graph_index + 1}\n"
+                        f"{time.strftime('%Y-%m-%d %H:%M:%S', snapshot.taken)}"
+                    )
+                    snapshot.compute_stats()
+                    page_artists = self.draw_waveforms(waveform_axes, snapshot)
+                    page_artists += self.draw_stats_table(table_axes, snapshot)
+                    pdf.savefig(figure)
+                    for artist in page_artists:
+                        artist.remove()
+                    self.pages_done += 1
+        except Exception as e:
+            self.error = e
+
+    def draw_waveforms(self, axes, snapshot):
+        # Waveforms, as vector paths
+        artists = []
+        for name, color, x_data, y_data in snapshot.traces:
+            artists += axes.plot(x_data, y_data, color=color, linewidth=0.7, label=name)
+        axes.set_xlim(snapshot.start, max(snapshot.stop, snapshot.start + 1e-6))
+        axes.relim()
+        axes.autoscale_view(scalex=False)
+        if artists:
+            artists.append(axes.legend(loc="upper right", fontsize=7))
+        return artists
+
+    def draw_stats_table(self, axes, snapshot):
+        # Statistics, as a table
+        cells = [
+            [name] + [f"{stats[column]:.4g}" for column in STATS_COLUMNS]
+            for name, stats in snapshot.stats
+        ]
+        if not cells:
+            return []
+        table = axes.table(
+            cellText=cells,
+            colLabels=["Signal"] + STATS_COLUMNS,
+            loc="upper center",
+            cellLoc="center",
+        )
+        table.auto_set_font_size(False)
+        table.set_fontsize(7)
+        table.scale(1, 1.4)
+        return [table]
+
+    def progress(self):
+        return self.pages_done, len(self.snapshots)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        self.cancel_event.set()
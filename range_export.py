@@ -0,0 +1,338 @@
+"""
+****************************************************************************************************
+    * @file	    :   range_export.py
+    * @brief	:   Streaming export of a time range of signals to CSV, WFDB or NumPy files
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import os
+import threading
+
+import numpy as np
+
+from tile_cache import signal_extrema
+
+EXPORT_FORMATS = {"CSV": ".csv", "WFDB (format 16)": ".hea", "NumPy": ".npy"}
+
+WFDB_DEFAULT_FS = 250  # What WFDB assumes when a header has no sampling frequency
+
+
+def fixed_point_fields(values, decimals):
+    # Text of each value with at most `decimals` decimals, trailing zeros dropped, built
+    # with array operations instead of formatting value by value. Returns a (n, width)
+    # character matrix and, per row, the [start, end) columns holding the text; missing
+    # (NaN) values are empty
+    missing = np.isnan(values)
+    scaled = np.round(np.where(missing, 0, values) * 10.0**decimals)
+    if np.abs(scaled).max(initial=0) >= 1e18:
+        # Beyond int64, fall back to formatting value by value
+        text = np.char.mod("%.7g", values)
+        text[missing] = ""
+        width = max(1, int(np.char.str_len(text).max(initial=1)))
+        chars = np.char.rjust(text, width).astype(f"S{width}")
+        chars = chars.view(np.uint8).reshape(len(values), width)
+        return chars, width - np.char.str_len(text), np.full(len(values), width)
+
+    magnitude = np.abs(scaled).astype(np.int64)
+    negative = scaled < 0
+    int_part, fraction = np.divmod(magnitude, 10**decimals)
+    int_digits = np.ones(len(values), dtype=np.int64)
+    while np.any(int_part >= 10 ** int_digits.max()):
+        int_digits += int_part >= 10**int_digits
+    trailing = np.zeros(len(values), dtype=np.int64)
+    zeros_so_far = np.ones(len(values), dtype=bool)
+    for k in range(decimals):
+        zeros_so_far &= (fraction // 10**k) % 10 == 0
+        trailing += zeros_so_far
+
+    # Right-aligned layout: sign, integer digits, point, all the decimals
+    int_end = 1 + int(int_digits.max())
+    width = int_end + (decimals + 1 if decimals else 0)
+    chars = np.zeros((len(values), width), dtype=np.uint8)
+    for k in range(int_end - 1):
+        chars[:, int_end - 1 - k] = 48 + (int_part // 10**k) % 10
+    if decimals:
+        chars[:, int_end] = ord(".")
+        for k in range(decimals):
+            chars[:, width - 1 - k] = 48 + (fraction // 10**k) % 10
+    start = int_end - int_digits - negative
+    chars[negative, start[negative]] = ord("-")
+    # Whole numbers lose the point along with their zeros
+    end = width - trailing - ((trailing == decimals) & (decimals > 0))
+    start[missing] = end[missing] = 0
+    return chars, start, end
+
+
+def csv_lines(columns):
+    # Join the fields of fixed_point_fields into comma separated lines, as bytes
+    n_rows = len(columns[0][0])
+    separator = np.full((n_rows, 1), ord(","), dtype=np.uint8)
+    pieces, masks = [], []
+    for k, (chars, start, end) in enumerate(columns):
+        cols = np.arange(chars.shape[1])
+        pieces.append(chars)
+        masks.append((cols >= start[:, None]) & (cols < end[:, None]))
+        last = k == len(columns) - 1
+        pieces.append(np.full((n_rows, 1), ord("\n"), np.uint8) if last else separator)
+        masks.append(np.ones((n_rows, 1), dtype=bool))
+    return np.hstack(pieces)[np.hstack(masks)].tobytes()
+
+
+class RangeExporter:
+    """
+    Writes the samples of the chosen signals between two times chunk by chunk, so the memory
+    used is one chunk of every channel no matter how long the range is. Each signal's own
+    timestamps pick its samples in the range and every sample is written with its time:
+    signals sampled at the same times share one time column, otherwise each signal gets its
+    own (a time column per signal in CSV, one .npy file per signal). Channels that end
+    before the others are padded with missing values (empty in CSV, NaN in .npy, the invalid
+    sample value in WFDB). Files are written under a temporary name and only renamed into
+    place once complete, so a cancelled or failed export leaves nothing behind.
+    """
+
+    def __init__(self, signals, start, stop, output_path, fmt, chunk_size=1 << 16):
+        # signals: list of (name, signal_data), start and stop in seconds
+        self.signals = signals
+        self.start = float(start)
+        self.stop = float(stop)
+        self.output_path = output_path
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+
+        # Samples [first, last) of each signal with a timestamp in [start, stop)
+        self.bounds = [
+            (
+                min(len(signal_data), signal_data.time_index.index_at(self.start)),
+                min(len(signal_data), signal_data.time_index.index_at(self.stop)),
+            )
+            for _, signal_data in signals
+        ]
+        self.samples_done = 0
+        self.n_samples = sum(last - first for first, last in self.bounds)
+        self.partial_paths = (
+            {}
+        )  # temporary path -> final path of each file being written
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start_export(self):
+        self.thread = threading.Thread(
+            target=self.run, name="range-export", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        try:
+            if self.fmt == "CSV":
+                self.write_csv()
+            elif self.fmt == "NumPy":
+                self.write_npy()
+            else:
+                self.write_wfdb()
+            if not self.cancel_event.is_set():
+                for partial_path, path in self.partial_paths.items():
+                    os.replace(partial_path, path)
+                self.partial_paths.clear()
+        except Exception as e:
+            self.error = e
+        finally:
+            for partial_path in self.partial_paths:
+                try:
+                    os.remove(partial_path)
+                except OSError:
+                    pass
+
+    def partial_path(self, path):
+        # Temporary name, next to the final file so the rename stays on one file system
+        partial_path = path + ".part"
+        self.partial_paths[partial_path] = path
+        return partial_path
+
+    def shared_times(self):
+        # True if every signal has its samples in the range at the same times
+        (first, last), time_index = self.bounds[0], self.signals[0][1].time_index
+        n = last - first
+        for (_, signal_data), (lo, hi) in zip(self.signals[1:], self.bounds[1:]):
+            other = signal_data.time_index
+            if hi - lo != n:
+                return False
+            if n == 0:
+                continue
+            # Two uniform time bases agree everywhere if they agree at both ends, other
+            # timestamps are compared a chunk at a time
+            if time_index.uniform and other.uniform:
+                rows = [np.array([0, n - 1])]
+            else:
+                rows = (
+                    np.arange(row, min(n, row + self.chunk_size))
+                    for row in range(0, n, self.chunk_size)
+                )
+            tolerance = 1e-6 * min(time_index.period, other.period)
+            for positions in rows:
+                difference = time_index.time_at(first + positions) - other.time_at(
+                    lo + positions
+                )
+                if np.abs(difference).max() > tolerance:
+                    return False
+        return True
+
+    def chunks(self, channels):
+        # (first row, physical values of shape (n, len(channels))) for each chunk in order,
+        # row r of a channel holding its r-th sample in the range
+        n_rows = self.n_rows(channels)
+        for row in range(0, n_rows, self.chunk_size):
+            if self.cancel_event.is_set():
+                return
+            n = min(self.chunk_size, n_rows - row)
+            block = np.full((n, len(channels)), np.nan)
+            for k, channel in enumerate(channels):
+                first, last = self.bounds[channel]
+                signal_data = self.signals[channel][1]
+                values = np.asarray(
+                    signal_data[min(last, first + row) : min(last, first + row + n)]
+                )
+                block[: len(values), k] = values
+                self.samples_done += len(values)
+            yield row, block
+
+    def n_rows(self, channels):
+        return max(
+            self.bounds[channel][1] - self.bounds[channel][0] for channel in channels
+        )
+
+    def times(self, channel, row, n):
+        # Times of rows [row, row + n) of a channel, NaN past its last sample
+        first, last = self.bounds[channel]
+        positions = np.arange(first + row, first + row + n)
+        time_index = self.signals[channel][1].time_index
+        return np.where(positions < last, time_index.time_at(positions), np.nan)
+
+    # --- Writers --- #
+    # --------------- #
+    def write_csv(self):
+        names = [name for name, _ in self.signals]
+        # Every channel is written to 7 significant digits of its largest magnitude
+        decimals = []
+        for (_, signal_data), (first, last) in zip(self.signals, self.bounds):
+            lo, hi = signal_extrema(signal_data, first, last)
+            peak = max(abs(lo), abs(hi)) if np.isfinite(lo) else 0
+            digits = int(np.floor(np.log10(peak))) + 1 if peak > 0 else 1
+            decimals.append(int(np.clip(7 - digits, 0, 15)))
+        # Times resolve a hundredth of the shortest sampling period
+        period = min(signal_data.time_index.period for _, signal_data in self.signals)
+        time_decimals = int(np.clip(np.ceil(-np.log10(period)) + 2, 0, 9))
+
+        shared = self.shared_times()
+        if shared:
+            header = ["time"] + names
+        else:
+            header = [field for name in names for field in (f"{name}_time", name)]
+        channels = list(range(len(names)))
+        with open(self.partial_path(self.output_path), "wb") as f:
+            f.write((",".join(header) + "\n").encode())
+            for row, block in self.chunks(channels):
+                values = [
+                    fixed_point_fields(block[:, channel], decimals[channel])
+                    for channel in channels
+                ]
+                if shared:
+                    times = self.times(0, row, len(block))
+                    columns = [fixed_point_fields(times, time_decimals)] + values
+                else:
+                    columns = []
+                    for channel in channels:
+                        times = self.times(channel, row, len(block))
+                        columns.append(fixed_point_fields(times, time_decimals))
+                        columns.append(values[channel])
+                f.write(csv_lines(columns))
+
+    def write_npy(self):
+        if self.shared_times():
+            self.write_npy_file(self.output_path, list(range(len(self.signals))))
+            return
+        # Signals sampled at different times go to one file each, named after the signal
+        stem, extension = os.path.splitext(self.output_path)
+        for channel, (name, _) in enumerate(self.signals):
+            self.write_npy_file(f"{stem}_{name}{extension}", [channel])
+
+    def write_npy_file(self, path, channels):
+        # Column 0 holds the time of each row, then one column per channel
+        header = {
+            "descr": np.lib.format.dtype_to_descr(np.dtype("<f8")),
+            "fortran_order": False,
+            "shape": (self.n_rows(channels), 1 + len(channels)),
+        }
+        with open(self.partial_path(path), "wb") as f:
+            np.lib.format.write_array_header_1_0(f, header)
+            for row, block in self.chunks(channels):
+                times = self.times(channels[0], row, len(block))
+                f.write(np.column_stack((times, block)).astype("<f8").tobytes())
+
+    def write_wfdb(self):
+        record_dir, file_name = os.path.split(self.output_path)
+        record_name = os.path.splitext(file_name)[0]
+
+        # A record has one sampling frequency for all its signals
+        rates = {getattr(signal_data, "fs", None) for _, signal_data in self.signals}
+        if len(rates) > 1:
+            raise ValueError(
+                "WFDB export needs signals with the same sampling frequency, got "
+                + ", ".join(f"{fs:g} Hz" if fs else "unknown" for fs in rates)
+            )
+
+        # Signals already holding 16-bit ADC counts keep their own gain and baseline,
+        # others are scaled to fill the 16-bit range
+        scaling = []
+        for (_, signal_data), (first, last) in zip(self.signals, self.bounds):
+            raw = getattr(signal_data, "raw", None)
+            if raw is not None and np.asarray(raw[:0]).dtype == np.int16:
+                scaling.append((signal_data.gain, signal_data.baseline))
+                continue
+            lo, hi = signal_extrema(signal_data, first, last)
+            if not np.isfinite(lo) or hi == lo:
+                lo, hi = (lo - 1, hi + 1) if np.isfinite(lo) else (-1, 1)
+            gain = 65534 / (hi - lo)
+            scaling.append((gain, int(round(-32767 - lo * gain))))
+        gains = np.array([gain for gain, _ in scaling])
+        baselines = np.array([baseline for _, baseline in scaling])
+
+        checksums = np.zeros(len(self.signals), dtype=np.int64)
+        initial_values = np.zeros(len(self.signals), dtype=np.int64)
+        dat_path = self.partial_path(os.path.join(record_dir, record_name + ".dat"))
+        with open(dat_path, "wb") as f:
+            for row, block in self.chunks(list(range(len(self.signals)))):
+                digital = np.round(block * gains + baselines)
+                digital = np.where(
+                    np.isnan(digital), -32768, np.clip(digital, -32767, 32767)
+                ).astype("<i2")
+                if row == 0 and len(digital):
+                    initial_values = digital[0].astype(np.int64)
+                checksums += digital.sum(axis=0, dtype=np.int64)
+                f.write(digital.tobytes())
+
+        # Header: one record line, then one line per signal
+        fs = rates.pop() or WFDB_DEFAULT_FS
+        n_rows = self.n_rows(list(range(len(self.signals))))
+        lines = [f"{record_name} {len(self.signals)} {fs:g} {n_rows}"]
+        for channel, (name, signal_data) in enumerate(self.signals):
+            units = getattr(signal_data, "units", "") or "NU"
+            checksum = (int(checksums[channel]) + 32768) % 65536 - 32768
+            lines.append(
+                f"{record_name}.dat 16 {gains[channel]:.10g}({baselines[channel]})/"
+                f"{units} 16 0 {initial_values[channel]} {checksum} 0 {name}"
+            )
+        hea_path = self.partial_path(os.path.join(record_dir, record_name + ".hea"))
+        with open(hea_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def progress(self):
+        return self.samples_done, self.n_samples
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        self.cancel_event.set()
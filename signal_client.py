@@ -0,0 +1,149 @@
+"""
+****************************************************************************************************
+    * @file	    :   signal_client.py
+    * @brief	:   Headless subscriber for the signal server, with a throughput/latency benchmark
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from signal_server import DEFAULT_PORT, read_message
+
+
+class SignalSubscriber:
+    """
+    Connects to a signal server, asks for one graph at a given viewport and decodes the
+    frames it streams. Keeps the counters the benchmark reports: frames, bytes and the
+    delay between a frame being encoded by the server and fully received here.
+    """
+
+    def __init__(
+        self, host="127.0.0.1", port=DEFAULT_PORT, graph=0, window=1.0, width=400
+    ):
+        self.host = host
+        self.port = port
+        self.graph = graph
+        self.window = window
+        self.width = width
+
+        self.channels = []
+        self.frame = None  # (playhead, {channel id: (t, y)}) of the newest frame
+        self.frames = 0
+        self.bytes = 0
+        self.latencies = []
+
+    async def run(self, duration):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        await self.set_viewport(writer, self.window, self.width)
+        deadline = time.perf_counter() + duration
+        try:
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    header, payload = await asyncio.wait_for(
+                        read_message(reader), remaining
+                    )
+                except asyncio.TimeoutError:
+                    break
+                self.handle_message(header, payload)
+                if header["type"] == "frame":
+                    # Ask for the next frame, the server holds back while frames are unread
+                    writer.write(json.dumps({"ack": header["time"]}).encode() + b"\n")
+        except asyncio.IncompleteReadError:
+            pass  # The server went away
+        finally:
+            writer.close()
+
+    async def set_viewport(self, writer, window, width):
+        self.window, self.width = window, width
+        request = {"graph": self.graph, "window": window, "width": width}
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+
+    def handle_message(self, header, payload):
+        if header["type"] == "channels":
+            self.channels = header["channels"]
+            return
+
+        received = time.time()
+        self.frames += 1
+        self.bytes += len(payload)
+        self.latencies.append(received - header["sent"])
+
+        # Times (seconds from the window start) then y of every channel, all float32
+        values = np.frombuffer(payload, dtype=np.float32)
+        data, offset = {}, 0
+        for channel in header["channels"]:
+            n = channel["points"]
+            t_data = values[offset : offset + n] + header["start"]
+            y_data = values[offset + n : offset + 2 * n]
+            data[channel["id"]] = (t_data, y_data)
+            offset += 2 * n
+        self.frame = (header["time"], data)
+
+
+async def benchmark(args):
+    # Mix of viewport widths, as different screens would ask for
+    subscribers = [
+        SignalSubscriber(
+            args.host,
+            args.port,
+            args.graph,
+            args.window,
+            args.width if not args.mixed_widths else args.width * (1 + k % 4) // 4,
+        )
+        for k in range(args.clients)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*(subscriber.run(args.seconds) for subscriber in subscribers))
+    elapsed = time.perf_counter() - started
+
+    frames = sum(subscriber.frames for subscriber in subscribers)
+    total_bytes = sum(subscriber.bytes for subscriber in subscribers)
+    latencies = np.concatenate(
+        [np.asarray(subscriber.latencies) for subscriber in subscribers] + [np.empty(0)]
+    )
+    print(f"Subscribers:      {args.clients}")
+    print(f"Frames received:  {frames} ({frames / elapsed:.0f} per second in total)")
+    print(f"Per subscriber:   {frames / max(1, args.clients) / elapsed:.1f} frames/s")
+    print(f"Throughput:       {total_bytes / elapsed / 1e6:.2f} MB/s")
+    if len(latencies):
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(
+            f"Latency:          p50 {p50:.1f} ms, p95 {p95:.1f} ms, "
+            f"max {latencies.max() * 1000:.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Subscribe to a signal server and report throughput and latency"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=1, help="number of subscribers")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--graph", type=int, default=0, help="0 for graph 1, 1 for graph 2"
+    )
+    parser.add_argument("--window", type=float, default=1.0, help="viewport in seconds")
+    parser.add_argument("--width", type=int, default=400, help="viewport in pixels")
+    parser.add_argument(
+        "--mixed-widths",
+        action="store_true",
+        help="spread the subscribers over 1/4 to 4/4 of --width",
+    )
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
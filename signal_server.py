@@ -0,0 +1,331 @@
+"""
+****************************************************************************************************
+    * @file	    :   signal_server.py
+    * @brief	:   Local fan-out server streaming decimated signals to other viewers over TCP
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import argparse
+import asyncio
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_PORT = 8765
+
+# Every message is: header length, payload length (big endian uint32), JSON header, payload
+MESSAGE_PREFIX = struct.Struct("!II")
+
+# Frames sent to a subscriber and not acknowledged yet, beyond this the subscriber is behind
+MAX_FRAMES_IN_FLIGHT = 2
+
+
+def encode_message(header, payload=b""):
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    return MESSAGE_PREFIX.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+async def read_message(reader):
+    header_length, payload_length = MESSAGE_PREFIX.unpack(
+        await reader.readexactly(MESSAGE_PREFIX.size)
+    )
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return header, payload
+
+
+class ClientSession:
+    # State of one connected subscriber, only touched from the server's event loop
+    def __init__(self, writer):
+        self.writer = writer
+        self.graph = 0
+        self.window = 1.0  # Seconds behind the playhead, like the viewer's cine window
+        self.width = 400  # Pixels, the stream carries at most 2 points per pixel
+        self.wake = asyncio.Event()
+        self.channels_sent = -1  # Channel list version last sent
+        self.frame_sent = None  # (graph, playhead) last sent
+        self.in_flight = 0  # Frames sent and not acknowledged yet
+
+
+class SignalServer:
+    """
+    Publishes the signals of a viewer to subscribers on localhost. The server runs its own
+    asyncio event loop on a background thread; the GUI only hands it the playhead of each
+    graph, as a time in seconds. Every client asks for a graph and a viewport (window in
+    seconds, width in pixels) and gets that window of every channel, found through the
+    channel's own timestamps, decimated from the tile cache to its width. Clients with the same
+    viewport share one encoded frame. Clients acknowledge each frame they have handled and
+    only a couple of frames are ever in flight, so a client that falls behind skips to the
+    newest frame instead of old ones queueing in the socket buffers.
+    """
+
+    def __init__(self, tile_cache, host="127.0.0.1", port=DEFAULT_PORT):
+        self.tile_cache = tile_cache
+        self.host = host
+        self.port = port
+        self.error = None
+
+        self.channels = []  # dicts of id, name, graph, source_id, time_index
+        self.channels_version = 0
+        self.playheads = {0: 0.0, 1: 0.0}  # Seconds
+        self.sessions = set()
+        self._frames = {}  # viewport key -> encoded frame for the current playheads
+
+        self.loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self.thread = None
+
+    # --- Called From the GUI Thread --- #
+    # ---------------------------------- #
+    def start(self):
+        self.thread = threading.Thread(
+            target=self._run, name="signal-server", daemon=True
+        )
+        self.thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def set_channels(self, channels):
+        # channels: list of (row, name, graph, tile cache id, time index)
+        channels = [
+            {
+                "id": row,
+                "name": name,
+                "graph": graph,
+                "source_id": source_id,
+                "time_index": time_index,
+            }
+            for row, name, graph, source_id, time_index in channels
+        ]
+        self.loop.call_soon_threadsafe(self._update_channels, channels)
+
+    def publish(self, graph_index, playhead):
+        # playhead: time in seconds the graph has played up to
+        self.loop.call_soon_threadsafe(self._update_playhead, graph_index, playhead)
+
+    def close(self):
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    # --- Event Loop --- #
+    # ------------------ #
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._serve_client, self.host, self.port)
+            )
+            # Port 0 asks the OS for a free port
+            self.port = self._server.sockets[0].getsockname()[1]
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            self.loop.close()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [
+            task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def _update_channels(self, channels):
+        self.channels = channels
+        self.channels_version += 1
+        self._frames.clear()
+        for session in self.sessions:
+            session.wake.set()
+
+    def _update_playhead(self, graph_index, playhead):
+        if self.playheads[graph_index] == playhead:
+            return
+        self.playheads[graph_index] = playhead
+        self._frames.clear()
+        for session in self.sessions:
+            if session.graph == graph_index:
+                session.wake.set()
+
+    async def _serve_client(self, reader, writer):
+        session = ClientSession(writer)
+        self.sessions.add(session)
+        session.wake.set()
+        receiver = asyncio.ensure_future(self._receive_requests(reader, session))
+        try:
+            while not receiver.done():
+                await session.wake.wait()
+                session.wake.clear()
+                # Always send the newest state, whatever was skipped while draining
+                if session.channels_sent != self.channels_version:
+                    session.channels_sent = self.channels_version
+                    writer.write(self.channels_message())
+                frame_key = (session.graph, self.playheads[session.graph])
+                if (
+                    session.frame_sent != frame_key
+                    and session.in_flight < MAX_FRAMES_IN_FLIGHT
+                ):
+                    session.frame_sent = frame_key
+                    session.in_flight += 1
+                    writer.write(self.frame_message(session))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            print(f"Error streaming to a subscriber: {e}")
+        finally:
+            receiver.cancel()
+            self.sessions.discard(session)
+            writer.close()
+
+    async def _receive_requests(self, reader, session):
+        # Subscribers send one JSON line per viewport change or handled frame
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                try:
+                    request = json.loads(line)
+                    if "ack" in request:
+                        session.in_flight = max(0, session.in_flight - 1)
+                        session.wake.set()
+                        continue
+                    session.graph = int(request.get("graph", session.graph)) % 2
+                    session.window = float(request.get("window", session.window))
+                    if not session.window > 0:
+                        raise ValueError(
+                            f"window must be positive, got {session.window}"
+                        )
+                    session.width = max(1, int(request.get("width", session.width)))
+                except (ValueError, TypeError) as e:
+                    print(f"Error reading a subscriber request: {e}")
+                    continue
+                session.frame_sent = None
+                session.wake.set()
+        except ConnectionError:
+            pass
+        finally:
+            session.wake.set()  # Let the sender notice the disconnect
+
+    # --- Messages --- #
+    # ---------------- #
+    def channels_message(self):
+        channels = [
+            {key: channel[key] for key in ("id", "name", "graph")}
+            for channel in self.channels
+        ]
+        return encode_message({"type": "channels", "channels": channels})
+
+    def frame_message(self, session):
+        # Shared by every client with the same graph and viewport
+        key = (session.graph, session.window, session.width)
+        message = self._frames.get(key)
+        if message is not None:
+            return message
+
+        # Binary search each channel's timestamps for its samples in the window
+        playhead = self.playheads[session.graph]
+        window_start = playhead - session.window
+        channels, parts = [], []
+        for channel in self.channels:
+            if channel["graph"] != session.graph:
+                continue
+            time_index = channel["time_index"]
+            start = time_index.index_at(window_start)
+            stop = time_index.index_at(playhead, side="right")
+            x_data, y_data = self.tile_cache.get_view(
+                channel["source_id"], start, stop, 2 * session.width
+            )
+            # Seconds, with breaks across gaps; relative to the window start they stay
+            # exact enough in float32
+            t_data, y_data = time_index.to_display(x_data, y_data)
+            parts.append((t_data - window_start).astype(np.float32).tobytes())
+            parts.append(np.asarray(y_data, dtype=np.float32).tobytes())
+            channels.append({"id": channel["id"], "points": len(t_data)})
+        header = {
+            "type": "frame",
+            "graph": session.graph,
+            "start": window_start,
+            "time": playhead,
+            "sent": time.time(),
+            "channels": channels,
+        }
+        message = encode_message(header, b"".join(parts))
+        self._frames[key] = message
+        return message
+
+
+def main():
+    # Serve a signal file headlessly, for benchmarking subscribers without a GUI
+    from signal_storage import read_signal_file
+    from tile_cache import TileCache
+
+    parser = argparse.ArgumentParser(description="Stream a signal file to subscribers")
+    parser.add_argument("files", nargs="+", help="signal files played on graph 1")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="seconds of signal played per second"
+    )
+    args = parser.parse_args()
+
+    tile_cache = TileCache()
+    signals = [read_signal_file(file_path) for file_path in args.files]
+    server = SignalServer(tile_cache, args.host, args.port)
+    server.start()
+    server.set_channels(
+        [
+            (
+                row,
+                file_path.split("/")[-1],
+                0,
+                tile_cache.add_signal(signal_data),
+                signal_data.time_index,
+            )
+            for row, (file_path, signal_data) in enumerate(zip(args.files, signals))
+        ]
+    )
+    print(f"Serving {len(signals)} signal(s) on {args.host}:{server.port}")
+
+    first_time = min(
+        float(signal_data.time_index.time_at(0)) for signal_data in signals
+    )
+    last_time = max(
+        float(signal_data.time_index.time_at(len(signal_data) - 1))
+        for signal_data in signals
+    )
+    started = time.perf_counter()
+    try:
+        playhead = first_time
+        while playhead < last_time:
+            time.sleep(1 / 60)
+            elapsed = time.perf_counter() - started
+            playhead = min(last_time, first_time + elapsed * args.speed)
+            server.publish(0, playhead)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        tile_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+****************************************************************************************************
+    * @file	    :   signal_storage.py
+    * @brief	:   Compact sample storage with lazy conversion to physical units
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from startup_timing import lazy_import
+
+# Raw value WFDB writes for a missing sample, per storage format
+WFDB_INVALID_SAMPLE_VALUE = {
+    "80": -128,
+    "212": -2048,
+    "310": -512,
+    "311": -512,
+    "16": -32768,
+    "61": -32768,
+    "160": -32768,
+    "24": -8388608,
+    "32": -2147483648,
+}
+
+
+def grid_index(position, side):
+    # First sample of a uniform grid at or after a fractional position ("left"), or after
+    # it ("right"), tolerating float noise in the position
+    if side == "left":
+        return max(0, int(np.ceil(position - 1e-9)))
+    return max(0, int(np.floor(position + 1e-9)) + 1)
+
+
+class TimeIndex:
+    """
+    The timestamp of every sample, in seconds. Uniformly sampled sources keep only their
+    start time and period and answer analytically. Fixed-rate sources with dropouts keep
+    the period and the first sample and start time of every uniform run between gaps, and
+    answer with a binary search over the runs; only truly irregular time columns are kept
+    whole and binary searched. Either way finding the samples of a time window costs O(log n),
+    and the display inserts a break wherever consecutive samples are much further apart
+    than the typical period, so gaps render as gaps.
+    """
+
+    def __init__(self, start=0.0, period=1.0, times=None, runs=None, gap_factor=1.5):
+        self.times = times
+        self.runs = runs  # (first sample, start time) of each uniform run, one period
+        self.steady = times is None
+        if times is not None and len(times):
+            start = float(times[0])
+            if len(times) > 1:
+                steps = np.diff(times)
+                period = float(np.median(steps))
+                # Gaps aside, nearly every step is the median one: a fixed-rate recording
+                # with dropouts, which still has a sampling frequency
+                self.steady = period > 0 and (
+                    np.mean(np.abs(steps - period) <= 0.25 * period) >= 0.99
+                )
+        self.start = start
+        self.period = period if period > 0 else 1.0
+        self.gap_factor = gap_factor
+
+    @classmethod
+    def from_times(cls, times):
+        # Keep the column only for truly irregular sampling. A fixed-rate source is split
+        # into runs wherever a step is far from the typical one, and the runs are placed on
+        # one grid with a whole number of periods missing at each gap (or, if the clock
+        # jumped, each run on a grid of its own) sharing one period. Timestamps
+        # printed to a few decimals jitter around the grid by less than a quarter period,
+        # while a dropped sample inside a run would shift it by at least half a period
+        times = np.ascontiguousarray(times, dtype=np.float64)
+        if len(times) < 2:
+            return cls(start=float(times[0]) if len(times) else 0.0)
+        steps = np.diff(times)
+        median = float(np.median(steps))
+        if median <= 0:
+            return cls(times=times)
+        step = float(np.mean(steps[np.abs(steps - median) <= 0.5 * median]))
+        gaps = np.flatnonzero(np.abs(steps - step) > 0.5 * step)
+        if len(gaps) >= max(1, len(times) // 16):
+            return cls(times=times)
+
+        # Grid slot of every sample, counting the missing ones
+        run_starts = np.concatenate(([0], gaps + 1))
+        lengths = np.diff(np.append(run_starts, len(times)))
+        missing = np.maximum(np.rint(steps[gaps] / step) - 1, 0).astype(np.int64)
+        skipped = np.concatenate(([0], np.cumsum(missing)))
+        slots = np.arange(len(times)) + np.repeat(skipped, lengths)
+
+        # The typical step when it fits (timestamps printed exactly), else the period
+        # fitted by least squares within the runs
+        run = np.repeat(np.arange(len(run_starts)), lengths)
+        slot_offsets = slots - slots[run_starts][run]
+        time_offsets = times - times[run_starts][run]
+        slot_offsets = (
+            slot_offsets - (np.add.reduceat(slot_offsets, run_starts) / lengths)[run]
+        )
+        time_offsets = (
+            time_offsets - (np.add.reduceat(time_offsets, run_starts) / lengths)[run]
+        )
+        fitted = float(slot_offsets @ time_offsets / (slot_offsets @ slot_offsets))
+        for period in dict.fromkeys((median, fitted)):
+            residual = times - slots * period
+            # One grid, through the first sample if it fits, else centred in the jitter
+            lo, hi = residual.min(), residual.max()
+            if hi - lo <= 0.5 * period:
+                start = float(times[0])
+                if max(hi - start, start - lo) > 0.25 * period:
+                    start = float((lo + hi) / 2)
+                if len(run_starts) == 1:
+                    return cls(start=start, period=period)
+                runs = (run_starts, start + slots[run_starts] * period)
+                return cls(start=start, period=period, runs=runs)
+            # A grid per run, placed the same way
+            lo = np.minimum.reduceat(residual, run_starts)
+            hi = np.maximum.reduceat(residual, run_starts)
+            if len(run_starts) > 1 and np.all(hi - lo <= 0.5 * period):
+                first = residual[run_starts]
+                run_times = np.where(
+                    np.maximum(hi - first, first - lo) <= 0.25 * period,
+                    times[run_starts],
+                    (lo + hi) / 2 + slots[run_starts] * period,
+                )
+                runs = (run_starts, run_times)
+                return cls(start=float(run_times[0]), period=period, runs=runs)
+        return cls(times=times)
+
+    @property
+    def uniform(self):
+        return self.times is None and self.runs is None
+
+    @property
+    def fs(self):
+        # Sampling frequency, for uniform sampling or a steady rate with gaps. Periods
+        # derived from printed timestamps carry float noise (3999.9999999999964 Hz)
+        return float(f"{1 / self.period:.9g}") if self.steady else None
+
+    @property
+    def nbytes(self):
+        if self.runs is not None:
+            return sum(array.nbytes for array in self.runs)
+        return 0 if self.uniform else self.times.nbytes
+
+    def time_at(self, positions):
+        # Time of (possibly fractional) sample positions
+        positions = np.asarray(positions, dtype=np.float64)
+        if self.uniform:
+            return self.start + positions * self.period
+        if self.runs is not None:
+            run_starts, run_times = self.runs
+            run = np.maximum(
+                np.searchsorted(run_starts, positions, side="right") - 1, 0
+            )
+            return run_times[run] + (positions - run_starts[run]) * self.period
+        if len(self.times) == 1:
+            return np.full(positions.shape, self.times[0])
+        # Interpolate between neighbours, extrapolate at the ends with the period
+        lower = np.clip(np.floor(positions).astype(np.int64), 0, len(self.times) - 2)
+        step = self.times[lower + 1] - self.times[lower]
+        return self.times[lower] + (positions - lower) * step
+
+    def index_at(self, t, side="left"):
+        # First sample at or after t ("left"), or after t ("right")
+        if self.uniform:
+            return grid_index((t - self.start) / self.period, side)
+        if self.runs is not None:
+            # The run t falls in, or the gap after it, which ends at the next run
+            run_starts, run_times = self.runs
+            run = int(np.searchsorted(run_times, t, side="right")) - 1
+            if run < 0:
+                return 0
+            position = (t - run_times[run]) / self.period
+            index = int(run_starts[run]) + grid_index(position, side)
+            if run + 1 < len(run_starts):
+                index = min(index, int(run_starts[run + 1]))
+            return index
+        return int(np.searchsorted(self.times, t, side=side))
+
+    def duration(self, stop):
+        # Time spanned by samples [0, stop), each sample lasting one period
+        if stop <= 0:
+            return 0.0
+        return float(self.time_at(stop - 1) - self.time_at(0)) + self.period
+
+    def to_display(self, x_data, y_data):
+        # Sample positions to times, with a NaN break across every gap in the timestamps
+        t_data = self.time_at(x_data)
+        if self.uniform or len(t_data) < 2:
+            return t_data, y_data
+        expected = np.diff(x_data) * self.period
+        gaps = np.flatnonzero(np.diff(t_data) > self.gap_factor * expected) + 1
+        if not len(gaps):
+            return t_data, y_data
+        t_data = np.insert(t_data, gaps, np.nan)
+        y_data = np.insert(np.asarray(y_data, dtype=np.float64), gaps, np.nan)
+        return t_data, y_data
+
+
+class ScaledSignal:
+    """
+    Keeps the samples the way they were stored: int16 ADC counts with their gain and baseline
+    for WFDB records, float32 for CSV/text sources. Slicing returns physical units, so only the
+    samples being displayed or analysed are ever converted.
+    """
+
+    def __init__(
+        self,
+        raw,
+        gain=1.0,
+        baseline=0,
+        invalid_value=None,
+        units="",
+        fs=None,
+        time_index=None,
+    ):
+        self.raw = raw
+        self.gain = gain
+        self.baseline = baseline
+        self.invalid_value = invalid_value  # raw value WFDB uses for missing samples
+        self.units = units
+        self.fs = fs  # Sampling frequency in Hz, when the source records it
+        if time_index is None:
+            time_index = TimeIndex(period=1 / fs if fs else 1.0)
+        self.time_index = time_index
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, index):
+        return self.to_physical(self.raw[index])
+
+    def __array__(self, dtype=None, copy=None):
+        physical = self.to_physical(self.raw[:])
+        return physical if dtype is None else physical.astype(dtype, copy=False)
+
+    def to_physical(self, raw):
+        if self.gain == 1 and self.baseline == 0 and self.invalid_value is None:
+            return raw
+        physical = (np.asarray(raw, dtype=np.float64) - self.baseline) / self.gain
+        if self.invalid_value is not None:
+            physical = np.where(raw == self.invalid_value, np.nan, physical)
+        return physical
+
+    @property
+    def nbytes(self):
+        return self.raw.nbytes
+
+    @property
+    def total_length(self):
+        # Final length, which is larger than len() while a worker is still publishing
+        return getattr(self.raw, "total_length", len(self.raw))
+
+
+class CompressedSamples:
+    """
+    Raw samples split into fixed-size blocks, each delta encoded, byte shuffled and compressed
+    with zlib. A block index maps a slice to the blocks it overlaps, so only those are ever
+    decompressed, and a small LRU keeps the blocks of the visible window and recent history.
+    """
+
+    def __init__(self, raw, block_size=1 << 16, hot_blocks=8, level=1):
+        raw = np.ascontiguousarray(raw)
+        self.dtype = raw.dtype
+        self.length = len(raw)
+        self.block_size = block_size
+        self.hot_blocks = hot_blocks
+        # Deltas are taken on the integer view of the samples, wrapping on overflow, so
+        # float32 sources round-trip bit for bit
+        self.delta_dtype = np.dtype(f"i{raw.dtype.itemsize}")
+        self.blocks = [
+            zlib.compress(self.encode(raw[start : start + block_size]), level)
+            for start in range(0, self.length, block_size)
+        ]
+        self._hot = OrderedDict()  # block index -> decompressed samples
+        self._lock = threading.Lock()
+
+    def encode(self, samples):
+        values = samples.view(self.delta_dtype)
+        deltas = np.diff(values, prepend=values.dtype.type(0))
+        # Group the bytes by significance, the high bytes of small deltas compress well
+        return deltas.view(np.uint8).reshape(-1, self.dtype.itemsize).T.tobytes()
+
+    def decode(self, payload):
+        shuffled = np.frombuffer(payload, dtype=np.uint8)
+        deltas = (
+            shuffled.reshape(self.dtype.itemsize, -1).T.copy().view(self.delta_dtype)
+        ).ravel()
+        return np.cumsum(deltas, dtype=self.delta_dtype).view(self.dtype)
+
+    def block(self, block_index):
+        with self._lock:
+            samples = self._hot.get(block_index)
+            if samples is not None:
+                self._hot.move_to_end(block_index)
+                return samples
+        samples = self.decode(zlib.decompress(self.blocks[block_index]))
+        samples.flags.writeable = False
+        with self._lock:
+            self._hot[block_index] = samples
+            while len(self._hot) > self.hot_blocks:
+                self._hot.popitem(last=False)
+        return samples
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.length
+            if not 0 <= index < self.length:
+                raise IndexError("sample index out of range")
+            return self.block(index // self.block_size)[index % self.block_size]
+
+        start, stop, step = index.indices(self.length)
+        if stop <= start:
+            return np.empty(0, dtype=self.dtype)
+        first, last = start // self.block_size, (stop - 1) // self.block_size
+        offset = first * self.block_size
+        if first == last:
+            samples = self.block(first)[start - offset : stop - offset]
+        else:
+            samples = np.concatenate([self.block(k) for k in range(first, last + 1)])[
+                start - offset : stop - offset
+            ]
+        return samples[::step]
+
+    @property
+    def nbytes(self):
+        return sum(len(block) for block in self.blocks)
+
+
+def compress_signal(signal_data):
+    # Same signal, with its raw samples held in compressed blocks
+    return ScaledSignal(
+        CompressedSamples(signal_data.raw),
+        gain=signal_data.gain,
+        baseline=signal_data.baseline,
+        invalid_value=signal_data.invalid_value,
+        units=signal_data.units,
+        fs=signal_data.fs,
+        time_index=signal_data.time_index,
+    )
+
+
+def read_signal_file(file_path):
+    # Read the first channel of a signal file into compact storage
+    if file_path.endswith(".hea") or file_path.endswith(".dat"):
+        # Keep the digital samples of WFDB records (int16 up to 16-bit formats), scaled
+        # on demand
+        wfdb = lazy_import("wfdb")
+        header = wfdb.rdheader(file_path[:-4])  # Remove ".hea" extension
+        fmt = header.fmt[0]
+        record = wfdb.rdrecord(
+            file_path[:-4],
+            channels=[0],
+            physical=False,
+            return_res=32 if fmt in ("24", "32") else 16,
+        )
+        return ScaledSignal(
+            np.ascontiguousarray(record.d_signal[:, 0]),
+            gain=record.adc_gain[0],
+            baseline=record.baseline[0],
+            invalid_value=WFDB_INVALID_SAMPLE_VALUE.get(fmt),
+            units=record.units[0],
+            fs=record.fs,
+        )
+
+    elif file_path.endswith(".csv"):
+        pd = lazy_import("pandas")
+        columns = pd.read_csv(file_path, nrows=0).columns
+        if "values" in columns:
+            # The signal data is in a column named "values", with an optional "time"
+            usecols = ["time", "values"] if "time" in columns else ["values"]
+            data_frame = pd.read_csv(file_path, usecols=usecols)
+        else:
+            # No header: the first column is the time, the second the value
+            data_frame = pd.read_csv(
+                file_path, header=None, usecols=[0, 1], names=["time", "values"]
+            )
+        return signal_from_columns(data_frame)
+
+    elif file_path.endswith(".txt"):
+        # Whitespace separated "time value" lines, as in the EMG recordings
+        pd = lazy_import("pandas")
+        data_frame = pd.read_csv(
+            file_path,
+            sep=r"\s+",
+            header=None,
+            usecols=[0, 1],
+            names=["time", "values"],
+            encoding="latin-1",
+        )
+        return signal_from_columns(data_frame)
+
+    raise ValueError(f"Unsupported signal file: {file_path}")
+
+
+def signal_from_columns(data_frame):
+    # float32 values and, when there is a time column, its timestamps. Unreadable values
+    # become missing samples rather than failing the whole file
+    pd = lazy_import("pandas")
+    values = pd.to_numeric(data_frame["values"], errors="coerce").to_numpy(np.float32)
+    if "time" not in data_frame:
+        return ScaledSignal(values)
+    times = pd.to_numeric(data_frame["time"], errors="coerce").to_numpy(np.float64)
+    # Rows without a usable time can't be placed on the axis
+    keep = ~np.isnan(times)
+    values, times = values[keep], times[keep]
+    if np.any(np.diff(times) < 0):
+        order = np.argsort(times, kind="stable")
+        values, times = values[order], times[order]
+    time_index = TimeIndex.from_times(times)
+    return ScaledSignal(values, fs=time_index.fs, time_index=time_index)
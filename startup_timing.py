@@ -0,0 +1,118 @@
+"""
+****************************************************************************************************
+    * @file	    :   startup_timing.py
+    * @brief	:   Lazy loading of heavy dependencies and a startup-time report
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import builtins
+import importlib
+import os
+import sys
+import threading
+import time
+
+START_TIME = time.perf_counter()
+
+# The report is requested with "--startup-report" or SIGNAL_VIEWER_STARTUP_REPORT=1
+REPORT_ENABLED = "--startup-report" in sys.argv or bool(
+    os.environ.get("SIGNAL_VIEWER_STARTUP_REPORT")
+)
+
+import_times = {}  # top-level package -> seconds, for imports done at startup
+lazy_import_times = {}  # module -> (seconds, "on demand" or "background")
+milestones = []  # (label, seconds since START_TIME)
+
+_original_import = builtins.__import__
+_import_depth = 0
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Time first-time imports made directly by the app, nested imports count towards them
+    global _import_depth
+    if (
+        _import_depth
+        or level
+        or name in sys.modules
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _import_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth -= 1
+        package = name.partition(".")[0]
+        import_times[package] = import_times.get(package, 0) + (
+            time.perf_counter() - start
+        )
+
+
+def stop_import_timing():
+    builtins.__import__ = _original_import
+
+
+if REPORT_ENABLED:
+    builtins.__import__ = _timed_import
+
+
+# --- Lazy Imports --- #
+# -------------------- #
+def lazy_import(module_name):
+    # Import a heavy dependency the first time its feature is used
+    module = sys.modules.get(module_name)
+    # A module the warm-up thread is still importing is already in sys.modules but only
+    # partly initialised, import_module then waits on its import lock
+    if module is not None and not getattr(module.__spec__, "_initializing", False):
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    source = (
+        "on demand"
+        if threading.current_thread() is threading.main_thread()
+        else "background"
+    )
+    lazy_import_times.setdefault(module_name, (time.perf_counter() - start, source))
+    if REPORT_ENABLED:
+        print(
+            f"[startup] {module_name} loaded {source} in "
+            f"{lazy_import_times[module_name][0] * 1000:.0f} ms"
+        )
+    return module
+
+
+def warm_up(module_names):
+    # Load the given modules on a daemon thread so their first use doesn't stall the GUI
+    def load_all():
+        for module_name in module_names:
+            try:
+                lazy_import(module_name)
+            except Exception as e:
+                print(f"Error warming up {module_name}: {e}")
+
+    thread = threading.Thread(target=load_all, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Startup Report --- #
+# ---------------------- #
+def milestone(label):
+    milestones.append((label, time.perf_counter() - START_TIME))
+
+
+def report():
+    lines = ["[startup] Import breakdown:"]
+    for package, seconds in sorted(
+        import_times.items(), key=lambda item: item[1], reverse=True
+    ):
+        lines.append(f"[startup]   {package:<24}{seconds * 1000:8.1f} ms")
+    lines.append(f"[startup]   {'total':<24}{sum(import_times.values()) * 1000:8.1f} ms")
+    for label, seconds in milestones:
+        lines.append(f"[startup] {label}: {seconds * 1000:.1f} ms")
+    print("\n".join(lines))
@@ -0,0 +1,250 @@
+"""
+****************************************************************************************************
+    * @file	    :   tile_cache.py
+    * @brief	:   LRU cache of display-ready signal tiles used for scrolling and seeking
+    * @authors	:   Mohamed Sami Ahmed
+                    Mohamed Sayed Abd El-Salam
+                    Kareem Salah Noureddine
+****************************************************************************************************
+"""
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def minmax_envelope(data, bucket_size):
+    # Reduce the data to one (min, max) pair per bucket, the last partial bucket included.
+    # Missing (NaN) samples are skipped, a bucket is NaN only if all of it is missing
+    data = np.asarray(data)
+    n_full = len(data) // bucket_size
+    mins = np.empty(n_full + (len(data) % bucket_size > 0), dtype=data.dtype)
+    maxs = np.empty_like(mins)
+    if n_full:
+        blocks = data[: n_full * bucket_size].reshape(n_full, bucket_size)
+        mins[:n_full] = np.fmin.reduce(blocks, axis=1)
+        maxs[:n_full] = np.fmax.reduce(blocks, axis=1)
+    if len(mins) > n_full:
+        tail = data[n_full * bucket_size :]
+        mins[-1] = np.fmin.reduce(tail)
+        maxs[-1] = np.fmax.reduce(tail)
+    return mins, maxs
+
+
+def signal_extrema(signal_data, start, stop, y_min=np.inf, y_max=-np.inf):
+    # Min/max of samples [start, stop), read in chunks so large ranges stay in bounded memory.
+    # Missing (NaN) samples are skipped
+    chunk_size = 1 << 20
+    for chunk_start in range(start, stop, chunk_size):
+        chunk = np.asarray(
+            signal_data[chunk_start : min(stop, chunk_start + chunk_size)]
+        )
+        chunk_min, chunk_max = float(np.fmin.reduce(chunk)), float(
+            np.fmax.reduce(chunk)
+        )
+        if not np.isnan(chunk_min):
+            y_min, y_max = min(y_min, chunk_min), max(y_max, chunk_max)
+    return y_min, y_max
+
+
+class TileCache:
+    """
+    The time axis of every signal is split into fixed-size tiles. Level 0 tiles hold the raw
+    (scaled) samples, higher levels hold min/max pairs over buckets of 2**level samples, so a
+    view of any width is assembled from a handful of tiles. Complete tiles are kept in an LRU
+    under a memory budget and the tiles ahead of the viewport are prefetched on a worker thread.
+    """
+
+    def __init__(
+        self, tile_size=4096, memory_budget=64 * 1024 * 1024, prefetch_tiles=2
+    ):
+        self.tile_size = tile_size
+        self.memory_budget = memory_budget
+        self.prefetch_tiles = prefetch_tiles
+        self.memory_used = 0
+
+        self._signals = {}
+        self._next_source_id = 0
+        self._tiles = OrderedDict()  # (source_id, level, tile_index) -> y data
+        self._pending = set()
+        self._last_view = {}  # source_id -> (level, first_tile) of the last request
+        self._summaries = {}  # source_id -> per-tile min/max summary (SignalOverview)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tile-prefetch"
+        )
+
+    # --- Signal Registration --- #
+    # --------------------------- #
+    def add_signal(self, signal_data, summary=None):
+        # summary: the signal's SignalOverview, its tile summaries (built at import with
+        # this cache's tile size) answer the running extrema
+        with self._lock:
+            source_id = self._next_source_id
+            self._next_source_id += 1
+            self._signals[source_id] = signal_data
+            if summary is not None:
+                self._summaries[source_id] = summary
+        return source_id
+
+    def remove_signal(self, source_id):
+        with self._lock:
+            self._signals.pop(source_id, None)
+            self._last_view.pop(source_id, None)
+            self._summaries.pop(source_id, None)
+            for key in [key for key in self._tiles if key[0] == source_id]:
+                self.memory_used -= self._tiles.pop(key).nbytes
+
+    # --- Views --- #
+    # ------------- #
+    def choose_level(self, span, max_points):
+        # Level 0 draws every sample, level L >= 2 draws 2 points per 2**L samples
+        if max_points <= 0 or span <= max_points:
+            return 0
+        return max(2, math.ceil(math.log2(2 * span / max_points)))
+
+    def get_view(self, source_id, start, stop, max_points):
+        # Return the (x, y) data to draw for samples [start, stop) of a signal
+        signal_data = self._signals[source_id]
+        start = max(0, int(start))
+        stop = min(len(signal_data), int(stop))
+        if stop <= start:
+            return np.empty(0), np.empty(0, dtype=np.float32)
+
+        level = self.choose_level(stop - start, max_points)
+        span = self.tile_size << level
+        first_tile = start // span
+        last_tile = (stop - 1) // span
+
+        x_parts, y_parts = [], []
+        for tile_index in range(first_tile, last_tile + 1):
+            y_tile = self.get_tile(source_id, level, tile_index)
+            x_parts.append(self.tile_x(level, tile_index, len(y_tile)))
+            y_parts.append(y_tile)
+        x_data = np.concatenate(x_parts)
+        y_data = np.concatenate(y_parts)
+
+        # Crop the outer tiles to the requested range
+        lo, hi = np.searchsorted(x_data, [start, stop])
+        self.schedule_prefetch(source_id, level, first_tile, last_tile)
+        return x_data[lo:hi], y_data[lo:hi]
+
+    def tile_x(self, level, tile_index, n_points):
+        start = tile_index * (self.tile_size << level)
+        if level == 0:
+            return np.arange(start, start + n_points, dtype=np.float64)
+        bucket = 1 << level
+        bucket_starts = start + bucket * np.arange(n_points // 2, dtype=np.float64)
+        return np.column_stack((bucket_starts, bucket_starts + bucket / 2)).ravel()
+
+    def get_tile(self, source_id, level, tile_index):
+        key = (source_id, level, tile_index)
+        with self._lock:
+            y_tile = self._tiles.get(key)
+            if y_tile is not None:
+                self._tiles.move_to_end(key)
+                return y_tile
+            signal_data = self._signals[source_id]
+        return self._build_tile(key, signal_data)
+
+    def _build_tile(self, key, signal_data):
+        _, level, tile_index = key
+        span = self.tile_size << level
+        start = tile_index * span
+        length = len(signal_data)  # Read once, a worker may still be publishing
+        finished = length == getattr(signal_data, "total_length", length)
+        stop = min(start + span, length)
+        if level == 0:
+            y_tile = np.asarray(signal_data[start:stop], dtype=np.float32)
+        else:
+            # Coarse tiles can span the whole recording, their samples are read in chunks
+            # of whole buckets so memory stays bounded
+            bucket = 1 << level
+            chunk_size = max(bucket, (1 << 20) // bucket * bucket)
+            y_tile = np.empty(2 * -(-(stop - start) // bucket), dtype=np.float32)
+            for chunk_start in range(start, stop, chunk_size):
+                samples = np.asarray(
+                    signal_data[chunk_start : min(stop, chunk_start + chunk_size)],
+                    dtype=np.float32,
+                )
+                mins, maxs = minmax_envelope(samples, bucket)
+                offset = 2 * ((chunk_start - start) // bucket)
+                y_tile[offset : offset + 2 * len(mins) : 2] = mins
+                y_tile[offset + 1 : offset + 2 * len(mins) : 2] = maxs
+
+        # Complete tiles are cached, and so is the last one once the signal stops growing;
+        # only the tile at the end of a growing signal is rebuilt
+        if stop - start == span or finished:
+            self._store(key, y_tile)
+        return y_tile
+
+    def _store(self, key, y_tile):
+        with self._lock:
+            if key in self._tiles or key[0] not in self._signals:
+                return
+            self._tiles[key] = y_tile
+            self.memory_used += y_tile.nbytes
+            while self.memory_used > self.memory_budget and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self.memory_used -= evicted.nbytes
+
+    # --- Prefetching --- #
+    # ------------------- #
+    def schedule_prefetch(self, source_id, level, first_tile, last_tile):
+        with self._lock:
+            previous = self._last_view.get(source_id)
+            self._last_view[source_id] = (level, first_tile)
+            signal_data = self._signals[source_id]
+            if previous is None or previous[0] != level or previous[1] == first_tile:
+                return
+            span = self.tile_size << level
+            n_tiles = math.ceil(len(signal_data) / span)
+            # Prefetch in the direction of travel
+            if first_tile > previous[1]:
+                ahead = range(last_tile + 1, last_tile + 1 + self.prefetch_tiles)
+            else:
+                ahead = range(first_tile - 1, first_tile - 1 - self.prefetch_tiles, -1)
+            keys = [
+                (source_id, level, tile_index)
+                for tile_index in ahead
+                if 0 <= tile_index < n_tiles
+                and (source_id, level, tile_index) not in self._tiles
+                and (source_id, level, tile_index) not in self._pending
+            ]
+            self._pending.update(keys)
+        for key in keys:
+            self._executor.submit(self._prefetch, key, signal_data)
+
+    def _prefetch(self, key, signal_data):
+        try:
+            self._build_tile(key, signal_data)
+        except Exception as e:
+            print(f"Error prefetching tile {key}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    # --- Running Extrema --- #
+    # ----------------------- #
+    def extrema(self, source_id, stop):
+        # Min/max of samples [0, stop). Whole tiles come from the summary computed at
+        # import, so seeking or rewinding never rescans the played prefix; only the samples
+        # past the last summarised tile are read
+        with self._lock:
+            signal_data = self._signals[source_id]
+            summary = self._summaries.get(source_id)
+        stop = min(len(signal_data), int(stop))
+        n_tiles = 0
+        if summary is not None and summary.tile_size == self.tile_size:
+            n_tiles = min(stop, summary.upto) // self.tile_size
+
+        y_min, y_max = signal_extrema(signal_data, n_tiles * self.tile_size, stop)
+        if n_tiles:
+            y_min = min(y_min, float(np.fmin.reduce(summary.tile_mins[:n_tiles])))
+            y_max = max(y_max, float(np.fmax.reduce(summary.tile_maxs[:n_tiles])))
+        return y_min, y_max
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)